@@ -1,48 +1,62 @@
 import streamlit as st
 import os
-from processor import MenuProcessor
+import threading
+from processor import MenuProcessor, get_menu_store, warm_up
+from pipeline import MenuPipeline
 from recommender import DishRecommender
-
-def normalize_dish_name(name):
-    name = (
-        name.lower()
-        .strip()
-        .replace("&", "and")
-        .replace("-", "_")
-        .replace(" ", "_")
-        .replace("(", "")
-        .replace(")", "")
-        .replace("*", "")
-        .replace(",", "")
-        .replace(".", "")
-        .replace("/", "")
-    )
-
-    while "__" in name:
-        name = name.replace("__", "_")
-
-    return name.strip("_")
-
-
+from image_index import DishImageIndex
+from thumbnails import ThumbnailCache
+from cache import content_key
+from chunking import normalize_name
+from currency import currency_code, project_dish
+from scoring import MenuArrays
+from metrics import get_metrics, timed
+
+@st.cache_resource
+def start_warm_up():
+    # OpenCV, EasyOCR and Gemini are imported lazily; load them in the
+    # background once per process while the user picks settings
+    thread = threading.Thread(target=warm_up, daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource
+def get_processor():
+    # layout=True sends compact "name | price" lines instead of a flat OCR stream
+    return MenuProcessor(layout=True)
+
+
+@st.cache_resource
+def get_image_index():
+    # Built once per process; rebuilt only when dish_images/ changes
+    return DishImageIndex(os.path.join(os.getcwd(), "dish_images"))
+
+
+@st.cache_resource
+def get_thumbnail_cache():
+    cache = ThumbnailCache(os.path.join(os.getcwd(), ".cache", "thumbnails"))
+    # Pre-render every dish image in the background so the first page is fast too
+    threading.Thread(
+        target=cache.prerender,
+        args=(get_image_index().paths(),),
+        daemon=True
+    ).start()
+    return cache
+
+
+@timed("image_lookup")
 def get_dish_image_path(dish_name):
-    base_dir = os.path.join(os.getcwd(), "dish_images")
-    normalized = normalize_dish_name(dish_name)
-
-    dish_dir = os.path.join(base_dir, normalized)
-
-    if os.path.exists(dish_dir):
-        images = [
-            f for f in os.listdir(dish_dir)
-            if f.lower().endswith((".jpg", ".png", ".jpeg"))
-        ]
-        if images:
-            return os.path.join(dish_dir, images[0])
-
-    return None
+    image_path = get_image_index().find(dish_name)
+    if image_path is None:
+        return None
+    # Serve the compressed display-size copy; fall back to the original
+    return get_thumbnail_cache().get(image_path) or image_path
 
 
 # Page Configuration
 st.set_page_config(page_title="Menu AI - Backpackers' Bytes", layout="wide")
+start_warm_up()
 
 st.title("🍽️ Smart Visual Menu Translator")
 st.markdown("**Perceptron 2026 Hackathon Project**")
@@ -52,6 +66,14 @@ st.markdown("**Perceptron 2026 Hackathon Project**")
 # ==========================================
 st.sidebar.header("User Customization")
 
+# 0. Restaurant (saved menus are tagged with it)
+restaurant_name = st.sidebar.text_input("Restaurant (optional):").strip()
+include_saved = st.sidebar.checkbox(
+    "Also recommend from saved menus of this restaurant",
+    value=False,
+    disabled=not restaurant_name
+)
+
 # 1. Output Language
 language_options = [
     "English", "Hindi", "Bengali", "Korean", "Japanese", "French",
@@ -74,6 +96,13 @@ target_currency = st.sidebar.selectbox(
     options=currency_options,
     index=0
 )
+# 💱 Dishes carry ISO codes; the sidebar label is only used for display
+currency_labels = {currency_code(label): label for label in currency_options}
+
+
+def price_text(dish):
+    return f"{dish.price} {currency_labels.get(dish.currency, dish.currency)}"
+
 
 # 3. Budget
 budget = st.sidebar.number_input(
@@ -91,6 +120,18 @@ dietary_choice = st.sidebar.radio(
     index=2
 )
 
+# 4.0 Allergies & Ingredients (hard filters)
+avoid_allergens = st.sidebar.multiselect(
+    "Avoid (allergies):",
+    options=["Peanut", "Tree Nut", "Dairy", "Gluten", "Egg", "Soy", "Shellfish", "Fish", "Sesame"],
+    default=[]
+)
+required_ingredients = [
+    name.strip() for name in st.sidebar.text_input(
+        "Must include ingredients (comma-separated):"
+    ).split(",") if name.strip()
+]
+
 # 4.1 Cuisine Preference
 st.sidebar.write("### Cuisine Preference")
 preferred_cuisines = st.sidebar.multiselect(
@@ -173,6 +214,8 @@ preferences = {
     "currency": target_currency,
     "budget": budget,
     "dietary_type": dietary_choice,
+    "avoid_allergens": avoid_allergens,
+    "required_ingredients": required_ingredients,
     "spice_tolerance": spice,
     "course_preference": course_preference,
     "multi_course_selection": multi_course_selection,
@@ -182,6 +225,20 @@ preferences = {
 
 }
 
+# 🐞 Debug panel: per-stage timings, token counts, cache hit rates (as of
+# the previous run; MENU_METRICS_PORT / MENU_METRICS_JSONL export the same)
+if st.sidebar.checkbox("Show debug metrics"):
+    metrics_summary = get_metrics().summary()
+    st.sidebar.write("### 🐞 Pipeline Metrics")
+    if metrics_summary["spans"]:
+        st.sidebar.table(metrics_summary["spans"])
+    if metrics_summary["samples"]:
+        st.sidebar.table(metrics_summary["samples"])
+    for name, value in {**metrics_summary["counters"], **metrics_summary["gauges"]}.items():
+        st.sidebar.write(f"`{name}`: {value:.2f}" if isinstance(value, float) else f"`{name}`: {value}")
+    if not any(metrics_summary.values()):
+        st.sidebar.caption("No measurements yet. Analyze a menu first.")
+
 # ==========================================
 # MAIN APP LOGIC
 # ==========================================
@@ -210,33 +267,165 @@ if uploaded_files:
     # ANALYZE BUTTON
     # --------------------
     with col2:
-        if st.button("Analyze Menu 🚀"):
-
-            with st.spinner(f"Reading Menu & Translating to {target_language}..."):
-                processor = MenuProcessor()
-                recommender = DishRecommender()
-
-                combined_menu = []
+        # 🔁 Structured pages live in session state keyed by image hash, so a
+        # preference change only re-runs the recommender and new uploads
+        # only process the pages that were added
+        file_hashes = [content_key(file.getvalue()) for file in uploaded_files]
+        menu_pages = st.session_state.setdefault("menu_pages", {})
+        for stale in set(menu_pages) - set(file_hashes):
+            del menu_pages[stale]
+        # ⚠️ Pages that failed (429, OCR error...) are retried on the next click
+        failed_pages = st.session_state.setdefault("failed_pages", set())
+        failed_pages.intersection_update(file_hashes)
+        # ✂️ Pages cut short keep their dishes until the next click re-runs them
+        partial_pages = st.session_state.setdefault("partial_pages", set())
+        partial_pages.intersection_update(file_hashes)
 
-                for file in uploaded_files:
-                    raw_text = processor.extract_text_from_image(file)
-
-                    menu_json = processor.structure_menu_data(
-                        raw_text,
-                        target_language=target_language,
-                        target_currency=target_currency
+        if st.button("Analyze Menu 🚀"):
+            st.session_state["analyzed"] = True
+            failed_pages.clear()
+            for h in partial_pages:
+                menu_pages.pop(h, None)
+            partial_pages.clear()
+
+        if st.session_state.get("analyzed"):
+            processor = get_processor()
+            recommender = DishRecommender()
+            new_pages = [
+                idx for idx, h in enumerate(file_hashes)
+                if h not in menu_pages and h not in failed_pages
+            ]
+
+            if new_pages:
+                with st.spinner(f"Reading Menu & Translating to {target_language}..."):
+                    # OCR and Gemini calls for all pages overlap; dishes stream in
+                    # as Gemini generates them and are shown / scored right away
+                    pipeline = MenuPipeline(processor, llm_workers=4)
+                    page_dishes = [[] for _ in new_pages]
+                    page_failed = set()
+
+                    live_pick = st.empty()
+                    live_feed = st.container()
+                    best_so_far = None
+
+                    # Menus digitized before (same image) come straight from the store
+                    for page_pos, dish in pipeline.stream(
+                        [uploaded_files[idx] for idx in new_pages],
+                        restaurant=restaurant_name or None
+                    ):
+                        if isinstance(dish, dict):
+                            page_failed.add(page_pos)
+                            if "partial" in dish:
+                                st.warning(
+                                    f"Menu {new_pages[page_pos] + 1}: some dishes may be "
+                                    f"missing ({dish['partial']})"
+                                )
+                            else:
+                                st.warning(f"Menu {new_pages[page_pos] + 1}: {dish['error']}")
+                            continue
+
+                        # Canonical dishes are kept; the feed shows local prices
+                        page_dishes[page_pos].append(dish)
+                        shown = project_dish(dish, target_currency, processor.rates)
+                        live_feed.write(
+                            f"✅ {shown.display_name} "
+                            f"— {price_text(shown)}"
+                        )
+
+                        # Scores are per dish, so the running best only needs
+                        # comparing against the newest dish
+                        candidates = [best_so_far, shown] if best_so_far else [shown]
+                        best, _ = recommender.recommend(candidates, preferences)
+                        if best:
+                            best_so_far = best
+                            live_pick.info(
+                                f"⭐ Top pick so far: {best.display_name}"
+                            )
+
+                    # A page with no dishes is not "known"; one with some
+                    # dishes but an error or cut-off chunk is kept as partial
+                    for page_pos, idx in enumerate(new_pages):
+                        if page_pos in page_failed and not page_dishes[page_pos]:
+                            failed_pages.add(file_hashes[idx])
+                            continue
+                        menu_pages[file_hashes[idx]] = page_dishes[page_pos]
+                        if page_pos in page_failed:
+                            partial_pages.add(file_hashes[idx])
+                    live_pick.empty()
+
+                    st.success("Menu Digitized!")
+
+                    # ⏱️ Cold-start vs warm model latency (shared process-wide pool)
+                    pool_stats = processor.pool.stats()
+                    st.caption(
+                        f"⏱️ OCR models: {pool_stats['cold_loads']} cold load(s) "
+                        f"({pool_stats['avg_cold_seconds']:.2f}s avg), "
+                        f"{pool_stats['warm_hits']} warm hit(s) "
+                        f"({pool_stats['avg_warm_seconds'] * 1000:.1f}ms avg)"
+                    )
+                    if processor.ocr_cache:
+                        ocr_stats = processor.ocr_cache.stats()
+                        st.caption(
+                            f"🗂️ OCR cache: {ocr_stats['hits']} hit(s), "
+                            f"{ocr_stats['misses']} miss(es)"
+                        )
+
+            # Keep page order for the final menu. The structured menu is
+            # language/currency independent; names are translated in one
+            # cached batch and prices come from the offline rate table. The
+            # localized menu and its scoring arrays are rebuilt only when the
+            # pages, language or currency change.
+            if failed_pages:
+                st.warning(
+                    f"{len(failed_pages)} menu page(s) could not be read; "
+                    f"press Analyze Menu to retry them."
+                )
+            if partial_pages:
+                st.warning(
+                    f"{len(partial_pages)} menu page(s) may be missing dishes; "
+                    f"press Analyze Menu to retry them."
+                )
+            done_hashes = tuple(h for h in file_hashes if h in menu_pages)
+            localized_key = (done_hashes, target_language, target_currency)
+            localized = st.session_state.get("localized")
+            if localized is None or localized[0] != localized_key:
+                combined_menu = processor.localize_menu(
+                    [dish for h in done_hashes for dish in menu_pages[h]],
+                    target_language=target_language,
+                    target_currency=target_currency
+                )
+                localized = (localized_key, combined_menu, MenuArrays(combined_menu))
+                st.session_state["localized"] = localized
+            _, combined_menu, menu_arrays = localized
+
+            # 🗄️ Dishes from earlier visits to the same restaurant join the
+            # candidates; diet / course filters run as indexed store queries
+            if include_saved and restaurant_name:
+                saved = recommender.candidates_from_store(
+                    get_menu_store(),
+                    preferences,
+                    target_currency,
+                    processor.rates,
+                    restaurant=restaurant_name,
+                    version=processor.menu_version()
+                )
+                seen_names = {normalize_name(dish.dish_name) for dish in combined_menu}
+                extra = []
+                for dish in saved.dishes:
+                    key = normalize_name(dish.dish_name)
+                    if key not in seen_names:
+                        seen_names.add(key)
+                        extra.append(dish)
+                if extra:
+                    menu_arrays = MenuArrays(
+                        combined_menu + processor.localize_menu(extra, target_language, target_currency)
                     )
-
-                    if isinstance(menu_json, list):
-                        combined_menu.extend(menu_json)
-
-                st.success("Menu Digitized!")
 
             # --------------------
             # DISPLAY MENU JSON
             # --------------------
             st.subheader(f"📖 Menu in {target_language}")
-            st.json(combined_menu)
+            st.json([dish.to_dict() for dish in combined_menu])
 
             # --------------------
             # RECOMMENDATION
@@ -245,22 +434,52 @@ if uploaded_files:
             with st.spinner("Finding the perfect dish based on your settings..."):
 
                 course_results = recommender.recommend_course_wise(
-                    combined_menu,
+                    menu_arrays,
                     preferences
                 )
 
                 st.divider()
                 st.subheader("🌟 Recommended for You")
 
+                # 🍱 Full meal: best combination across courses within the budget
+                if "Full Meal" in course_preference:
+                    meals = recommender.recommend_full_meal(menu_arrays, preferences, top_n=3)
+
+                    if meals:
+                        best_meal = meals[0]
+                        st.markdown(
+                            f"### 🍱 Best meal within your budget "
+                            f"({best_meal['total_price']:g} {target_currency})"
+                        )
+                        for course, pick in best_meal["courses"].items():
+                            meal_dish = pick["dish"]
+                            st.write(
+                                f"- **{course}:** {meal_dish.translated_name} "
+                                f"({price_text(meal_dish)})"
+                            )
+
+                        if len(meals) > 1:
+                            with st.expander("Other meal combinations"):
+                                for meal in meals[1:]:
+                                    st.write(
+                                        " + ".join(
+                                            str(pick["dish"].translated_name)
+                                            for pick in meal["courses"].values()
+                                        )
+                                        + f" — {meal['total_price']:g} {target_currency}"
+                                    )
+                    else:
+                        st.warning("No full meal fits your budget. Showing the best dish per course instead.")
+
                 if course_results:
                     for course, data in course_results.items():
                         dish = data["dish"]
                         reason = data["reason"]
 
                         st.markdown(f"### 🍽️ Best {course}")
-                        st.write(f"**{dish.get('translated_name')}** ({dish.get('dish_name')})")
+                        st.write(f"**{dish.translated_name}** ({dish.dish_name})")
                         # 🔹 Always use English name for image lookup
-                        image_key_name = dish.get("dish_name") or dish.get("translated_name")
+                        image_key_name = dish.dish_name
                     
                         image_path = get_dish_image_path(image_key_name)
                         # 🔍 DEBUG: show resolved image path
@@ -269,52 +488,61 @@ if uploaded_files:
                             st.image(image_path, caption=image_key_name, use_container_width=True)
                         else:
                             st.warning("📷 Image not available for this dish")
-                        st.write(f"💰 Price: {dish.get('price')} {dish.get('currency')}")
+                        st.write(f"💰 Price: {price_text(dish)}")
                         st.markdown("### ✅ Why this dish is recommended")
 
                         for r in reason:
                             st.markdown(f"- {r}")
 
-                        st.write(f"📝 Description: {dish.get('description')}")
+                        st.write(f"📝 Description: {dish.description}")
                         # 🧾 Ingredient list (if available)
-                        enrich = dish.get("enrichment", {})
-                        ingredients = enrich.get("ingredients", [])
+                        enrich = dish.enrichment
+                        ingredients = enrich.ingredients
                         if ingredients:
                             st.write(f"🧾 Ingredients: {', '.join(ingredients)}")
 
                         # 🔔 Allergen Indicators
-                        enrich = dish.get("enrichment", {})
-                        allergens = enrich.get("allergens", [])
+                        allergens = enrich.allergens
 
                         if allergens:
                             st.write(f"⚠️ Allergens: {', '.join(allergens)}")
                         else:
                             st.write("✅ No common allergens detected")
-                        dish_name = dish.get("translated_name") or dish.get("dish_name")
+
+                        # 🥈 Runners-up from the same scoring pass
+                        runners_up = data.get("runners_up", [])
+                        if runners_up:
+                            with st.expander(f"Other good {course} options"):
+                                for alt in runners_up:
+                                    alt_dish = alt["dish"]
+                                    st.write(
+                                        f"**{alt_dish.translated_name}** ({alt_dish.dish_name}) "
+                                        f"— {price_text(alt_dish)} · score {alt['score']}"
+                                    )
 
                     st.stop()
 
                 # Fallback single recommendation
-                best_dish, reason = recommender.recommend(combined_menu, preferences)
+                best_dish, reason = recommender.recommend(menu_arrays, preferences)
 
                 if best_dish:
-                    st.info(f"**{best_dish.get('translated_name')}** ({best_dish.get('dish_name')})")
-                    st.write(f"💰 Price: {best_dish.get('price')} {best_dish.get('currency')}")
+                    st.info(f"**{best_dish.translated_name}** ({best_dish.dish_name})")
+                    st.write(f"💰 Price: {price_text(best_dish)}")
                     st.markdown("### ✅ Why this dish is recommended")
                     for r in reason:
                         st.markdown(f"- {r}")
 
-                    st.write(f"📝 Description: {best_dish.get('description')}")
+                    st.write(f"📝 Description: {best_dish.description}")
 
-                    enrich = best_dish.get("enrichment", {})
-                    st.write(f"🔥 Calories: {enrich.get('calories_approx', 'N/A')} kcal")
-                    st.write(f"🌍 Cuisine: {enrich.get('cuisine', 'Unknown')}")
+                    enrich = best_dish.enrichment
+                    st.write(f"🔥 Calories: {enrich.calories_approx or 'N/A'} kcal")
+                    st.write(f"🌍 Cuisine: {enrich.cuisine or 'Unknown'}")
                     # 🔹 Regional cuisine display
-                    region = enrich.get("region")
+                    region = enrich.region
                     if region:
                         st.write(f"📍 Region: {region}")
 
-                    allergens = enrich.get("allergens", [])
+                    allergens = enrich.allergens
                     if allergens:
                         st.write(f"⚠️ Allergens: {', '.join(allergens)}")
                     else:
@@ -325,3 +553,6 @@ if uploaded_files:
                         "No dish matched all filters perfectly. "
                         "Try adjusting budget or course selection."
                     )
+else:
+    # Nothing uploaded: the next upload waits for Analyze again
+    st.session_state.pop("analyzed", None)
@@ -0,0 +1,210 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from cache import content_key
+from image_index import IMAGE_EXTENSIONS
+from processor import MenuProcessor, is_error_menu
+
+_worker_processor = None
+
+
+def find_images(directory):
+    """
+    Every menu image under `directory`, as sorted relative paths.
+    """
+    found = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(root, name), directory))
+    return sorted(found)
+
+
+def completed_paths(output_path):
+    """
+    Paths already digitized completely in an existing JSONL file; errors and
+    partial pages (some chunks failed) are left to be retried. A line cut
+    short by a crash is dropped from the file so appending stays valid.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+
+    for line in data[:end].decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if "error" in record or record.get("failed_chunks"):
+            done.discard(record.get("path"))
+        else:
+            done.add(record.get("path"))
+    return done
+
+
+def _init_ocr_worker(languages, layout, threads):
+    global _worker_processor
+    try:
+        import torch
+        # Parallelism comes from processes; one torch thread each avoids oversubscription
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    # OCR only: the reader pool and OCR cache. Gemini is set up lazily on the
+    # first LLM call, which only ever happens in the parent process
+    _worker_processor = MenuProcessor(languages=languages, layout=layout, llm_cache=False,
+                                      translation_cache=False)
+
+
+def _ocr_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    started = time.perf_counter()
+    text = _worker_processor.extract_text_from_image(io.BytesIO(data))
+    return content_key(data), text, time.perf_counter() - started
+
+
+def digitize_directory(directory, output_path, ocr_workers=None, llm_workers=4,
+                       target_language=None, target_currency=None, languages=("en",),
+                       layout=True, resume=True, max_chunk_tokens=1200, retries=2,
+                       progress=None):
+    """
+    Digitize every image under `directory` into `output_path` (JSONL, one
+    record per image, written as soon as it finishes).
+
+    OCR runs in a process pool of `ocr_workers` (default: one per core);
+    at most `llm_workers` Gemini calls are in flight. With `resume`, images
+    already written without error are skipped, so an interrupted run can
+    simply be started again; pages with failed chunks are written with
+    `failed_chunks` > 0 and retried too. `progress(record)` is called per
+    record. Returns counts: total, skipped, done, partial, failed.
+    """
+    paths = find_images(directory)
+    done = completed_paths(output_path) if resume else set()
+    todo = [p for p in paths if p not in done]
+    summary = {"total": len(paths), "skipped": len(paths) - len(todo), "done": 0, "partial": 0, "failed": 0}
+    if not todo:
+        return summary
+
+    processor = MenuProcessor(languages=languages, layout=layout)
+    ocr_workers = ocr_workers or os.cpu_count() or 1
+
+    def structure(path, image_hash, raw_text, ocr_seconds):
+        started = time.perf_counter()
+        menu, failed_chunks = processor.structure_menu_chunked(
+            raw_text,
+            target_language=target_language,
+            target_currency=target_currency,
+            max_tokens=max_chunk_tokens,
+            # Chunks run one at a time so llm_workers bounds all Gemini calls
+            workers=1,
+            retries=retries
+        )
+        if is_error_menu(menu):
+            return {"path": path, "image_hash": image_hash, "error": menu[0]["error"]}
+        return {
+            "path": path,
+            "image_hash": image_hash,
+            "dishes": [dish.to_dict() for dish in menu],
+            # Non-zero: sections are missing; resume processes the page again
+            "failed_chunks": failed_chunks,
+            "ocr_seconds": round(ocr_seconds, 3),
+            "llm_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(ocr_workers, initializer=_init_ocr_worker,
+                                initargs=(tuple(languages), layout, 1)) as ocr_pool, \
+            ThreadPoolExecutor(llm_workers, thread_name_prefix="batch-llm") as llm_pool:
+
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if "error" in record:
+                summary["failed"] += 1
+            else:
+                summary["partial" if record["failed_chunks"] else "done"] += 1
+            if progress:
+                progress(record)
+
+        futures = {
+            ocr_pool.submit(_ocr_file, os.path.join(directory, path)): ("ocr", path)
+            for path in todo
+        }
+        while futures:
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, path = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed = "OCR" if stage == "ocr" else "AI Parsing"
+                    write({"path": path, "error": f"{failed} failed: {str(e)}"})
+                    continue
+                if stage == "ocr":
+                    futures[llm_pool.submit(structure, path, *result)] = ("llm", path)
+                else:
+                    write(result)
+
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Digitize a directory of menu images to JSONL.")
+    parser.add_argument("directory", help="Directory of menu images (searched recursively)")
+    parser.add_argument("output", help="JSONL file to write (appended to when resuming)")
+    parser.add_argument("--ocr-workers", type=int, default=None, help="OCR processes (default: CPU count)")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Concurrent Gemini calls")
+    parser.add_argument("--language", default=None, help="Translate dish names to this language")
+    parser.add_argument("--currency", default=None, help="Convert prices to this currency code")
+    parser.add_argument("--ocr-languages", default="en", help="Comma-separated EasyOCR languages")
+    parser.add_argument("--no-layout", action="store_true")
+    parser.add_argument("--restart", action="store_true", help="Overwrite output instead of resuming")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+
+    def progress(record):
+        if "error" in record:
+            status = f"error: {record['error']}"
+        else:
+            status = f"{len(record['dishes'])} dishes"
+            if record["failed_chunks"]:
+                status += f" ({record['failed_chunks']} section(s) failed)"
+        print(f"{record['path']}: {status}", file=sys.stderr, flush=True)
+
+    summary = digitize_directory(
+        args.directory,
+        args.output,
+        ocr_workers=args.ocr_workers,
+        llm_workers=args.llm_workers,
+        target_language=args.language,
+        target_currency=args.currency,
+        languages=tuple(args.ocr_languages.split(",")),
+        layout=not args.no_layout,
+        resume=not args.restart,
+        progress=progress
+    )
+    elapsed = time.perf_counter() - started
+    processed = summary["done"] + summary["partial"] + summary["failed"]
+    print(
+        f"{summary['done']} digitized, {summary['partial']} partial, {summary['failed']} failed, "
+        f"{summary['skipped']} already done, {summary['total']} total "
+        f"in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.2f} images/s)"
+    )
+    return 1 if summary["failed"] or summary["partial"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
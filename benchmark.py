@@ -0,0 +1,326 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from fake_gemini import sample_responder
+from image_index import DishImageIndex
+from llm_client import GeminiClient
+from model_pool import ModelPool
+from models import Dish, Enrichment
+from recommender import DishRecommender
+from thumbnails import ThumbnailCache
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+RESOLUTIONS = [(640, 480), (1280, 960), (2592, 1944), (4000, 3000)]
+MENU_SIZES = [10, 100, 1_000, 10_000, 100_000]
+SUITES = ("ocr", "structure", "recommender", "images")
+
+PREFERENCES = {
+    "budget": 400,
+    "dietary_type": "Mix (Any) 🥘",
+    "spice_tolerance": "Medium",
+    "course_preference": "Full Meal (Starter + Main + Dessert)",
+    "multi_course_selection": ["Starter", "Main Course", "Dessert", "Beverage"],
+    "preferred_cuisines": ["Indian", "Thai"],
+    "eating_style": "Balanced ⚖️ (Both)",
+    "health_goal": "High Protein 💪",
+}
+
+
+# ------------------------------
+# Stubs (no network, deterministic)
+# ------------------------------
+class _Text:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """
+    Gemini stand-in: canned fake_gemini responses after a fixed latency.
+    """
+
+    def __init__(self, latency=0.0, chunk_size=64):
+        self.latency = latency
+        self.chunk_size = chunk_size
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        time.sleep(self.latency)
+        text = sample_responder(prompt)
+        if stream:
+            return [_Text(text[i:i + self.chunk_size]) for i in range(0, len(text), self.chunk_size)]
+        return _Text(text)
+
+
+class StubReader:
+    """
+    EasyOCR stand-in: fixed tokens, so only decode/preprocess is measured.
+    """
+
+    def readtext(self, image, detail=0):
+        height, width = image.shape[:2]
+        if detail:
+            return [([[0, 0], [width, 0], [width, 20], [0, 20]], "Paneer Tikka 250", 0.9)]
+        return ["Paneer Tikka", "250"]
+
+
+def _stub_client(latency):
+    # Rate limit effectively off: the benchmark measures our code, not the quota
+    return GeminiClient(StubModel(latency), requests_per_minute=1e9, burst=1e9)
+
+
+def _processor(ocr_stub, llm_latency=0.0, **settings):
+    from processor import MenuProcessor
+
+    reader_factory = (lambda languages: StubReader()) if ocr_stub else None
+    pool = ModelPool(reader_factory=reader_factory, model_factory=lambda name: StubModel(llm_latency))
+    return MenuProcessor(pool=pool, ocr_cache=False, llm_cache=False, translation_cache=False,
+                         client=_stub_client(llm_latency), **settings)
+
+
+# ------------------------------
+# Synthetic inputs
+# ------------------------------
+def menu_image(width, height, rng, lines=30):
+    """
+    PNG bytes of a white page with dish / price lines scaled to the page.
+    """
+    import cv2
+    import numpy as np
+
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    scale = height / 900
+    step = height // (lines + 2)
+    for i in range(lines):
+        name = f"{rng.choice(['Paneer', 'Chicken', 'Veg', 'Prawn', 'Mango'])} " \
+               f"{rng.choice(['Tikka', 'Curry', 'Biryani', 'Lassi', 'Salad'])}"
+        y = step * (i + 2)
+        cv2.putText(image, name, (int(width * 0.08), y), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), 2)
+        cv2.putText(image, str(rng.randint(50, 900)), (int(width * 0.78), y),
+                    cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), 2)
+    ok, encoded = cv2.imencode(".png", image)
+    return encoded.tobytes()
+
+
+def synthetic_menu(n, rng):
+    courses = ["Starter", "Main Course", "Dessert", "Beverage"]
+    cuisines = ["Indian", "Thai", "Italian", "Chinese", "Mexican", "French"]
+    ingredients = ["chicken", "paneer", "rice", "tofu", "garlic", "peanut", "cream", "egg", "dal", "onion"]
+    return [
+        Dish(
+            dish_name=f"Dish {i}",
+            price=float(rng.randint(40, 900)),
+            currency="INR",
+            course_type=rng.choice(courses),
+            enrichment=Enrichment(
+                cuisine=rng.choice(cuisines),
+                spice_level=rng.choice(["Low", "Medium", "High"]),
+                is_veg=rng.random() < 0.5,
+                calories_approx=rng.randint(80, 900),
+                allergens=rng.sample(["Dairy", "Gluten", "Peanuts"], rng.randint(0, 2)),
+                ingredients=rng.sample(ingredients, 3),
+            ),
+        )
+        for i in range(n)
+    ]
+
+
+# ------------------------------
+# Measuring
+# ------------------------------
+def measure(name, fn, repeat, items=1, warmup=1):
+    """
+    Run `fn` `repeat` times (after `warmup` runs); p50/p95 per call and
+    throughput in items per second.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        "name": name,
+        "runs": repeat,
+        "p50_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000,
+        "throughput": items * repeat / sum(samples) if sum(samples) else 0.0,
+    }
+
+
+def bench_ocr(args, rng):
+    ocr_stub = args.stub_ocr
+    if not ocr_stub:
+        try:
+            import easyocr  # noqa: F401
+        except ImportError:
+            print("easyocr not installed; OCR uses a stub reader (decode + preprocess only)")
+            ocr_stub = True
+
+    processor = _processor(ocr_stub)
+    label = "stub" if ocr_stub else "easyocr"
+    results = []
+    for width, height in RESOLUTIONS:
+        data = menu_image(width, height, rng)
+        results.append(measure(
+            f"ocr[{label}]/{width}x{height}",
+            lambda: processor.extract_text_from_image(io.BytesIO(data)),
+            repeat=max(3, args.repeat // 4 if not ocr_stub else args.repeat)
+        ))
+    return results
+
+
+def bench_structure(args, rng):
+    latency = args.llm_latency / 1000
+    processor = _processor(True, llm_latency=latency)
+    raw_text = "\n".join(f"Dish {i} | {rng.randint(50, 900)}" for i in range(40))
+    tag = f"latency={args.llm_latency:g}ms"
+    return [
+        measure(f"structure/{tag}", lambda: processor.structure_menu_data(raw_text), repeat=args.repeat),
+        measure(
+            f"structure+localize/{tag}",
+            lambda: processor.structure_menu_data(raw_text, "French", "USD"),
+            repeat=args.repeat
+        ),
+        measure(f"stream/{tag}", lambda: list(processor.stream_menu_data(raw_text)), repeat=args.repeat),
+    ]
+
+
+def bench_recommender(args, rng):
+    recommender = DishRecommender()
+    results = []
+    for n in MENU_SIZES:
+        if n > args.max_dishes:
+            continue
+        menu = synthetic_menu(n, rng)
+        # Large menus take a while per call; fewer runs keep the suite short
+        repeat = max(3, min(args.repeat, 2_000_000 // (n * 20)))
+        results.append(measure(f"recommend/{n}", lambda: recommender.recommend(menu, PREFERENCES),
+                               repeat=repeat, items=n))
+        results.append(measure(f"course_wise/{n}",
+                               lambda: recommender.recommend_course_wise(menu, PREFERENCES),
+                               repeat=repeat, items=n))
+        results.append(measure(f"full_meal/{n}",
+                               lambda: recommender.recommend_full_meal(menu, PREFERENCES),
+                               repeat=repeat, items=n))
+    return results
+
+
+def bench_images(args, rng):
+    base_dir = args.images
+    if not os.path.isdir(base_dir):
+        print(f"{base_dir} not found; skipping image lookup")
+        return []
+
+    index = DishImageIndex(base_dir)
+    folders = sorted(os.listdir(base_dir))
+    queries = []
+    for folder in folders:
+        name = folder.replace("_", " ")
+        queries.append(name.title())
+        # A one-letter typo exercises the fuzzy path
+        if len(name) > 4:
+            i = rng.randrange(1, len(name) - 1)
+            queries.append(name[:i] + name[i + 1] + name[i] + name[i + 2:])
+    queries.append("Completely Unknown Dish")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        thumbnails = ThumbnailCache(cache_dir)
+
+        def lookup_all():
+            # Same steps as app.get_dish_image_path
+            for query in queries:
+                path = index.find(query)
+                if path is not None:
+                    thumbnails.get(path)
+
+        cold = measure("image_lookup/cold", lookup_all, repeat=1, items=len(queries), warmup=0)
+        warm = measure("image_lookup/warm", lookup_all, repeat=args.repeat, items=len(queries))
+    return [cold, warm]
+
+
+# ------------------------------
+# Baseline
+# ------------------------------
+def compare(results, baseline, tolerance):
+    """
+    Attach p50 ratios against the baseline; returns names that regressed.
+    """
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get(result["name"])
+        if not base or not base["p50_ms"]:
+            result["vs_baseline"] = None
+            continue
+        ratio = result["p50_ms"] / base["p50_ms"]
+        result["vs_baseline"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(result["name"])
+    return regressions
+
+
+def _print(results):
+    print(f"{'benchmark':<38} {'p50 ms':>10} {'p95 ms':>10} {'items/s':>12} {'vs base':>9}")
+    for r in results:
+        ratio = r.get("vs_baseline")
+        versus = f"{ratio:8.2f}x" if ratio is not None else "        -"
+        print(f"{r['name']:<38} {r['p50_ms']:10.3f} {r['p95_ms']:10.3f} {r['throughput']:12.1f} {versus}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline performance benchmarks (stubbed Gemini).")
+    parser.add_argument("--only", action="append", choices=SUITES, help="Run only these suites")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=50.0, help="Stub model latency in ms")
+    parser.add_argument("--stub-ocr", action="store_true", help="Skip EasyOCR; time decode + preprocess")
+    parser.add_argument("--max-dishes", type=int, default=max(MENU_SIZES))
+    parser.add_argument("--images", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "dish_images"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown vs baseline")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    suites = {"ocr": bench_ocr, "structure": bench_structure,
+              "recommender": bench_recommender, "images": bench_images}
+    results = []
+    for name in args.only or SUITES:
+        # Each suite gets its own seeded RNG so --only runs see the same inputs
+        results.extend(suites[name](args, random.Random(f"{args.seed}:{name}")))
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+    _print(results)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
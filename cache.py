@@ -0,0 +1,302 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_key(data, *parts):
+    """
+    SHA-256 of raw bytes plus any extra settings that affect the result.
+    """
+    h = hashlib.sha256()
+    h.update(data)
+    for part in parts:
+        h.update(b"\0")
+        h.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _expired(expires_at):
+    return expires_at is not None and expires_at <= time.time()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with a fixed number of entries and an
+    optional time-to-live (seconds).
+    """
+
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if not _expired(expires_at):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskCache:
+    """
+    JSON-file cache in a directory, evicting least recently used files once
+    the directory grows past `max_bytes`. Eviction goes down to
+    `low_water` of the limit, so the directory is not rescanned on every
+    put once full. Entries older than `ttl` seconds are treated as misses
+    and removed.
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, ttl=None, low_water=0.9):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.low_water = low_water
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._entries())
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, st.st_mtime, st.st_size))
+        return entries
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            expires_at, value = entry["expires_at"], entry["value"]
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return default
+
+        if _expired(expires_at):
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return default
+
+        # Touch so eviction order follows last use, not creation
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        expires_at = time.time() + self.ttl if self.ttl else None
+        payload = json.dumps(
+            {"expires_at": expires_at, "value": value}, ensure_ascii=False
+        ).encode("utf-8")
+
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+
+        with self._lock:
+            try:
+                self._total_bytes -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+            self._total_bytes += len(payload)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        target = self.max_bytes * self.low_water
+
+        for path, _, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+        self._total_bytes = total
+
+    def _remove(self, path):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+
+class TieredCache:
+    """
+    Memory LRU in front of an optional disk tier. Disk hits are promoted
+    into memory.
+    """
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else LRUCache()
+        self.disk = disk
+
+    def get(self, key, default=None):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+                return value
+
+        return default
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        stats = {
+            "memory_hits": self.memory.hits,
+            "memory_misses": self.memory.misses,
+            "memory_entries": len(self.memory),
+        }
+        if self.disk is not None:
+            stats["disk_hits"] = self.disk.hits
+            stats["disk_misses"] = self.disk.misses
+            stats["disk_bytes"] = self.disk.total_bytes
+
+        hits = stats["memory_hits"] + stats.get("disk_hits", 0)
+        stats["hits"] = hits
+        # A request only misses if it missed every tier
+        stats["misses"] = stats.get("disk_misses", stats["memory_misses"])
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function, later callers wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def begin(self, key):
+        """
+        Manual form of do() for results produced incrementally (streams):
+        returns (call, leader). The leader must end it with finish(); the
+        others wait on call.done and read call.result / call.error.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    def do(self, key, fn):
+        call, leader = self.begin(key)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        result, error = None, None
+        try:
+            result = fn()
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.finish(key, call, result, error)
@@ -0,0 +1,116 @@
+import re
+
+from models import Dish
+
+# Rough size of a token for budgeting (English-ish menu text)
+CHARS_PER_TOKEN = 4
+
+HEADING_WORDS = (
+    "starter", "starters", "appetizer", "appetizers", "antipasti", "small plates",
+    "soup", "soups", "salad", "salads", "main", "mains", "main course", "main courses",
+    "entree", "entrees", "curries", "rice", "breads", "pasta", "pizza", "pizzas",
+    "noodles", "sides", "dessert", "desserts", "dolci", "sweets",
+    "beverage", "beverages", "drinks", "hot drinks", "cold drinks", "coffee", "tea",
+    "mocktails", "cocktails", "wine", "wines",
+)
+
+# A price at the end of a dish in flat (single-line) OCR text
+_PRICE_END_RE = re.compile(r"(?:[₹$€£¥₩]\s*)?\d{1,6}(?:[.,]\d{1,2})?(?:\s*/-)?(?=\s|$)")
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _lines(raw_text):
+    """
+    Layout OCR gives one menu row per line. Flat OCR text is cut after each
+    price so chunks never split a dish from its price.
+    """
+    if "\n" in raw_text:
+        return [line.strip() for line in raw_text.splitlines() if line.strip()]
+
+    lines, start = [], 0
+    for match in _PRICE_END_RE.finditer(raw_text):
+        lines.append(raw_text[start:match.end()].strip())
+        start = match.end()
+    lines.append(raw_text[start:].strip())
+    return [line for line in lines if line]
+
+
+def is_heading(line):
+    text = line.strip().strip(":-–—*#").strip()
+    if not text or "|" in text or any(ch.isdigit() for ch in text):
+        return False
+    if text.lower() in HEADING_WORDS:
+        return True
+    # Short all-caps lines ("CHEF'S SPECIALS") are section titles on most menus
+    letters = [ch for ch in text if ch.isalpha()]
+    return len(text.split()) <= 4 and len(letters) >= 3 and all(ch.isupper() for ch in letters)
+
+
+def split_menu_text(raw_text, max_tokens=1200):
+    """
+    Split OCR text into chunks of whole sections (by detected headings),
+    each within `max_tokens`. Oversized sections are split between rows and
+    repeat their heading so the model keeps the course context.
+    """
+    sections = []
+    for line in _lines(raw_text or ""):
+        if is_heading(line) or not sections:
+            sections.append([line])
+        else:
+            sections[-1].append(line)
+
+    chunks, current = [], []
+
+    def flush():
+        if current:
+            chunks.append("\n".join(current))
+            current.clear()
+
+    for section in sections:
+        section_text = "\n".join(section)
+        if estimate_tokens("\n".join(current + section)) <= max_tokens:
+            current.extend(section)
+            continue
+
+        flush()
+        if estimate_tokens(section_text) <= max_tokens:
+            current.extend(section)
+            continue
+
+        heading = section[0] if is_heading(section[0]) else None
+        for line in section:
+            if current and estimate_tokens("\n".join(current + [line])) > max_tokens:
+                flush()
+                if heading and line != heading:
+                    current.append(heading)
+            current.append(line)
+
+    flush()
+    return chunks
+
+
+def normalize_name(name):
+    name = re.sub(r"[^\w\s]", " ", str(name or "").casefold())
+    return " ".join(name.split())
+
+
+def merge_dishes(chunk_menus):
+    """
+    Flatten per-chunk Dish lists in order, dropping error entries and
+    repeated dishes (same normalized original name).
+    """
+    merged, seen = [], set()
+    for menu in chunk_menus:
+        for dish in menu or []:
+            if not isinstance(dish, Dish):
+                continue
+            key = normalize_name(dish.dish_name)
+            if key in seen:
+                continue
+            if key:
+                seen.add(key)
+            merged.append(dish)
+    return merged
@@ -0,0 +1,120 @@
+import json
+import os
+import re
+
+RATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "currency_rates.json")
+
+# Currencies that are not normally shown with decimals
+ZERO_DECIMAL = {"JPY", "KRW", "IDR", "VND"}
+
+# Symbols Gemini (or a menu) may use instead of an ISO code
+SYMBOLS = {
+    "₹": "INR", "RS": "INR", "RS.": "INR", "$": "USD", "€": "EUR", "£": "GBP",
+    "¥": "JPY", "₩": "KRW", "DH": "AED", "฿": "THB", "₫": "VND",
+}
+
+
+class RateTable:
+    """
+    Offline exchange-rate table: units of each currency per one `base` unit.
+    """
+
+    def __init__(self, rates, base="USD", as_of=None):
+        self.rates = {code.upper(): float(rate) for code, rate in rates.items()}
+        self.base = base.upper()
+        self.as_of = as_of
+        self.rates.setdefault(self.base, 1.0)
+
+    @classmethod
+    def load(cls, path=RATES_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["rates"], base=data.get("base", "USD"), as_of=data.get("as_of"))
+
+    def convert(self, amount, from_code, to_code):
+        """
+        Convert `amount`; returns None when either currency is unknown.
+        """
+        from_rate = self.rates.get(from_code)
+        to_rate = self.rates.get(to_code)
+        if from_rate is None or to_rate is None:
+            return None
+        return amount / from_rate * to_rate
+
+
+_default_rates = None
+
+
+def get_rate_table():
+    global _default_rates
+    if _default_rates is None:
+        _default_rates = RateTable.load()
+    return _default_rates
+
+
+def currency_code(label):
+    """
+    "INR (₹)" / "inr" / "₹" -> "INR"; None if nothing recognisable.
+    """
+    if not label:
+        return None
+    text = str(label).strip()
+    first = text.split()[0].upper()
+    if first in SYMBOLS:
+        return SYMBOLS[first]
+    if len(first) == 3 and first.isalpha():
+        return first
+    return SYMBOLS.get(text.upper())
+
+
+def parse_price(price):
+    """
+    Number from a printed price ("₹ 250/-", "12,50", "1,250"); None if absent.
+    """
+    if isinstance(price, bool):
+        return None
+    if isinstance(price, (int, float)):
+        return float(price)
+    if isinstance(price, str):
+        text = price.strip()
+        # "12,50" is a decimal comma; "1,250" is a thousands separator
+        if "." not in text and re.search(r"\d,\d{1,2}\D*$", text):
+            text = text.replace(",", ".")
+        match = re.search(r"\d+(?:\.\d+)?", text.replace(",", ""))
+        return float(match.group()) if match else None
+    return None
+
+
+def project_dish(dish, target_currency, rates=None):
+    """
+    Copy of a canonical Dish with its price in `target_currency` (a code,
+    symbol or UI label such as "INR (₹)"); the dish's currency is set to
+    the ISO code, never the label.
+
+    The menu's own price and currency are kept in `original_price` /
+    `original_currency`, so projecting again (to another currency) always
+    starts from the printed price. Unknown currencies are left as printed.
+    """
+    rates = rates or get_rate_table()
+    projected = dish.copy()
+
+    if projected.original_price is None and projected.original_currency is None:
+        projected.original_price = dish.price
+        projected.original_currency = dish.currency
+
+    from_code = currency_code(projected.original_currency)
+    to_code = currency_code(target_currency)
+    amount = projected.original_price
+
+    converted = None
+    if amount is not None and from_code and to_code:
+        converted = rates.convert(amount, from_code, to_code)
+
+    if converted is None:
+        projected.price = projected.original_price
+        projected.currency = projected.original_currency
+    else:
+        projected.price = float(round(converted)) if to_code in ZERO_DECIMAL else round(converted, 2)
+        projected.currency = to_code
+
+    return projected
@@ -0,0 +1,197 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_MENU = [
+    {
+        "dish_name": "Paneer Tikka", "language_original": "English", "description": "Grilled cottage cheese",
+        "price": 250, "currency": "INR", "course_type": "Starter",
+        "enrichment": {"cuisine": "Indian", "region": "North Indian", "spice_level": "Medium",
+                       "is_veg": True, "calories_approx": 320, "allergens": ["Dairy"],
+                       "ingredients": ["paneer", "yogurt", "spices"]},
+    },
+    {
+        "dish_name": "Butter Chicken", "language_original": "English", "description": "Chicken in tomato gravy",
+        "price": 420, "currency": "INR", "course_type": "Main Course",
+        "enrichment": {"cuisine": "Indian", "region": "Punjabi", "spice_level": "Medium",
+                       "is_veg": False, "calories_approx": 550, "allergens": ["Dairy"],
+                       "ingredients": ["chicken", "butter", "tomato"]},
+    },
+    {
+        "dish_name": "Gulab Jamun", "language_original": "English", "description": "Milk dumplings in syrup",
+        "price": 120, "currency": "INR", "course_type": "Dessert",
+        "enrichment": {"cuisine": "Indian", "region": None, "spice_level": "Low",
+                       "is_veg": True, "calories_approx": 300, "allergens": ["Dairy", "Gluten"],
+                       "ingredients": ["khoya", "sugar", "flour"]},
+    },
+]
+
+
+def sample_responder(prompt):
+    """
+    SAMPLE_MENU for structuring prompts; for name translation prompts, the
+    requested names tagged with the target language.
+    """
+    match = re.search(r"dish names to (.+?)\.\s.*?(\[.*\])", prompt, re.S)
+    if match:
+        language, names = match.group(1), json.loads(match.group(2))
+        return json.dumps([f"{name} ({language})" for name in names], ensure_ascii=False)
+    return "```json\n" + json.dumps(SAMPLE_MENU, indent=2) + "\n```"
+
+
+class FakeGeminiServer:
+    """
+    Local stand-in for the Gemini REST API (generateContent and
+    streamGenerateContent?alt=sse) that injects faults:
+
+    - `latency`: seconds added before every response
+    - `error_rate`: share of requests answered with `error_status`
+    - `truncate_rate`: share of responses cut off half-way
+
+    Point HTTPGeminiModel (or GEMINI_BASE_URL) at `url`. Faults use a seeded
+    RNG, so a run can be replayed.
+    """
+
+    def __init__(self, responder=sample_responder, host="127.0.0.1", port=0, latency=0.0,
+                 error_rate=0.0, error_status=429, truncate_rate=0.0, chunk_size=64, seed=0):
+        self.responder = responder
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.truncate_rate = truncate_rate
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        # Clients giving up mid-response (deadlines) are expected here
+        self._server.handle_error = lambda request, client_address: None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _roll(self):
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.error_rate
+            truncate = self._random.random() < self.truncate_rate
+            if fail:
+                self.errors += 1
+        return fail, truncate
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length))
+                    prompt = "".join(
+                        part.get("text", "")
+                        for content in request["contents"] for part in content["parts"]
+                    )
+                except (ValueError, KeyError, TypeError):
+                    self._send_json(400, {"error": {"code": 400, "message": "bad request",
+                                                    "status": "INVALID_ARGUMENT"}})
+                    return
+
+                if server.latency:
+                    time.sleep(server.latency)
+                fail, truncate = server._roll()
+                if fail:
+                    self._send_json(server.error_status, {"error": {
+                        "code": server.error_status,
+                        "message": "injected failure",
+                        "status": "RESOURCE_EXHAUSTED" if server.error_status == 429 else "UNAVAILABLE",
+                    }})
+                    return
+
+                text = server.responder(prompt)
+                if truncate:
+                    text = text[:len(text) // 2]
+
+                if ":streamGenerateContent" in self.path:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for i in range(0, len(text), server.chunk_size):
+                        event = {"candidates": [{"content": {
+                            "role": "model", "parts": [{"text": text[i:i + server.chunk_size]}]
+                        }}]}
+                        self.wfile.write(b"data: " + json.dumps(event).encode("utf-8") + b"\r\n\r\n")
+                        self.wfile.flush()
+                    return
+
+                self._send_json(200, {"candidates": [{
+                    "content": {"role": "model", "parts": [{"text": text}]},
+                    "finishReason": "MAX_TOKENS" if truncate else "STOP",
+                }]})
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        """
+        Serve in the calling thread until interrupted.
+        """
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Gemini API with injected faults.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeGeminiServer(port=args.port, latency=args.latency, error_rate=args.error_rate,
+                              error_status=args.error_status, truncate_rate=args.truncate_rate)
+    print(f"Fake Gemini on {server.url} (set GEMINI_BASE_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
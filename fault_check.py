@@ -0,0 +1,64 @@
+import argparse
+import sys
+import time
+
+from fake_gemini import SAMPLE_MENU, FakeGeminiServer
+from llm_client import HTTPGeminiModel
+from model_pool import ModelPool
+from processor import MenuProcessor, is_error_menu
+
+
+def run_pages(pages=20, error_rate=0.5, truncate_rate=0.3, error_status=429, seed=1,
+              stream=False):
+    """
+    Structure `pages` distinct menu texts with a default-configured
+    MenuProcessor (rate limit, retries, breaker) against a FakeGeminiServer
+    injecting faults. Faults are seeded and pages run one after another, so
+    a run is reproducible. Returns (pages structured, complete pages, errors);
+    a page salvaged from truncated output counts as structured, not complete.
+    """
+    with FakeGeminiServer(error_rate=error_rate, error_status=error_status,
+                          truncate_rate=truncate_rate, seed=seed) as server:
+        pool = ModelPool(model_factory=lambda name: HTTPGeminiModel(name, server.url))
+        processor = MenuProcessor(pool=pool, ocr_cache=False, llm_cache=False,
+                                  translation_cache=False, preprocess=False)
+        structured, complete, errors = 0, 0, []
+        for i in range(pages):
+            raw_text = f"Page {i}\nPaneer Tikka 250\nButter Chicken 420\nGulab Jamun 120"
+            if stream:
+                menu = list(processor.stream_menu_data(raw_text))
+                failed = [m for m in menu if isinstance(m, dict)]
+                menu = [m for m in menu if not isinstance(m, dict)] or failed
+            else:
+                menu, failed = processor.structure_menu_chunked(raw_text)
+            if is_error_menu(menu):
+                errors.append(menu[0]["error"])
+                continue
+            structured += 1
+            complete += not failed and len(menu) == len(SAMPLE_MENU)
+        return structured, complete, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Structure menus against an unreliable fake Gemini.")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.5)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--truncate-rate", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stream", action="store_true", help="Use the streaming path the app uses")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    structured, complete, errors = run_pages(args.pages, args.error_rate, args.truncate_rate,
+                                             args.error_status, args.seed, args.stream)
+    print(f"{structured}/{args.pages} pages structured ({complete} complete, "
+          f"{structured - complete} salvaged from truncated output) "
+          f"in {time.perf_counter() - started:.1f}s")
+    for error in errors:
+        print(f"  {error}")
+    return 0 if structured == args.pages else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from cache import LRUCache
+
+IMAGE_EXTENSIONS = (".jpg", ".png", ".jpeg", ".webp", ".avif")
+_MISSING = object()
+
+
+def normalize_dish_name(name):
+    name = (
+        name.lower()
+        .strip()
+        .replace("&", "and")
+        .replace("-", "_")
+        .replace(" ", "_")
+        .replace("(", "")
+        .replace(")", "")
+        .replace("*", "")
+        .replace(",", "")
+        .replace(".", "")
+        .replace("/", "")
+    )
+
+    while "__" in name:
+        name = name.replace("__", "_")
+
+    return name.strip("_")
+
+
+def _bigrams(token):
+    padded = f"${token}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def _similarity(a, b):
+    """
+    Dice coefficient over character bigrams ("briyani" ~ "biryani" = 0.625).
+    """
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class DishImageIndex:
+    """
+    In-memory index of `dish_images/<normalized_name>/<image>` folders.
+
+    Built once and rebuilt only when the image directory or one of its dish
+    folders changes mtime (checked at most every `check_interval` seconds),
+    so images added to or removed from an existing folder are picked up
+    too. Exact lookups are a
+    dict hit; fuzzy lookups match query words against the folder-name
+    vocabulary through a bigram index, so only plausible folders are scored.
+    A folder matches only when (nearly) all of its words are in the query.
+    """
+
+    def __init__(self, base_dir, min_similarity=0.6, check_interval=2.0, max_lookups=4096):
+        self.base_dir = base_dir
+        self.min_similarity = min_similarity
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._checked_at = 0.0
+        self._exact = {}
+        self._folder_tokens = {}
+        self._token_folders = {}
+        self._token_bigrams = {}
+        self._bigram_tokens = {}
+        # Fuzzy results (including misses) for recently seen dish names
+        self._lookups = LRUCache(max_entries=max_lookups)
+
+        self.refresh(force=True)
+
+    # ------------------------------
+    # Building
+    # ------------------------------
+    def refresh(self, force=False):
+        """
+        Rebuild if the directory changed since the last build.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+
+        mtimes = self._folder_mtimes()
+        if not force and mtimes == self._mtimes:
+            return
+
+        with self._lock:
+            self._build()
+            self._mtimes = mtimes
+
+    def _folder_mtimes(self):
+        """
+        mtime of the image directory and of every folder in it (None if the
+        directory is missing).
+        """
+        try:
+            mtimes = {"": os.stat(self.base_dir).st_mtime}
+            for entry in os.scandir(self.base_dir):
+                if entry.is_dir():
+                    mtimes[entry.name] = entry.stat().st_mtime
+        except OSError:
+            return None
+        return mtimes
+
+    def _build(self):
+        exact = {}
+        if os.path.isdir(self.base_dir):
+            for entry in os.scandir(self.base_dir):
+                if not entry.is_dir():
+                    continue
+                images = sorted(
+                    f for f in os.listdir(entry.path)
+                    if f.lower().endswith(IMAGE_EXTENSIONS)
+                )
+                if images:
+                    exact[normalize_dish_name(entry.name)] = os.path.join(entry.path, images[0])
+
+        folder_tokens = {}
+        token_folders = defaultdict(set)
+        for name in exact:
+            tokens = tuple(t for t in name.split("_") if t)
+            folder_tokens[name] = tokens
+            for token in tokens:
+                token_folders[token].add(name)
+
+        token_bigrams = {token: _bigrams(token) for token in token_folders}
+        bigram_tokens = defaultdict(set)
+        for token, grams in token_bigrams.items():
+            for gram in grams:
+                bigram_tokens[gram].add(token)
+
+        self._exact = exact
+        self._folder_tokens = folder_tokens
+        self._token_folders = dict(token_folders)
+        self._token_bigrams = token_bigrams
+        self._bigram_tokens = dict(bigram_tokens)
+        self._lookups.clear()
+
+    # ------------------------------
+    # Lookup
+    # ------------------------------
+    def find(self, dish_name):
+        """
+        Image path for a dish name: exact folder match first, then the best
+        fuzzy match above `min_similarity`, else None.
+        """
+        if not dish_name:
+            return None
+
+        self.refresh()
+        normalized = normalize_dish_name(dish_name)
+
+        path = self._exact.get(normalized)
+        if path is not None:
+            return path
+
+        path = self._lookups.get(normalized, _MISSING)
+        if path is _MISSING:
+            path = self._fuzzy(normalized)
+            self._lookups.put(normalized, path)
+        return path
+
+    def _fuzzy(self, normalized):
+        query_tokens = [t for t in normalized.split("_") if t]
+        if not query_tokens:
+            return None
+
+        # Known tokens close enough to each query word
+        matches = []
+        folders = set()
+        for query in query_tokens:
+            grams = _bigrams(query)
+            candidates = set()
+            for gram in grams:
+                candidates |= self._bigram_tokens.get(gram, set())
+            close = {}
+            for token in candidates:
+                sim = _similarity(grams, self._token_bigrams[token])
+                if sim >= self.min_similarity:
+                    close[token] = sim
+                    folders |= self._token_folders[token]
+            matches.append(close)
+
+        best, best_key = None, None
+        for name in folders:
+            tokens = self._folder_tokens[name]
+            # Pair query words with folder words one-to-one, closest pairs first
+            pairs = sorted(
+                ((close[token], qi, ti)
+                 for qi, close in enumerate(matches)
+                 for ti, token in enumerate(tokens) if token in close),
+                reverse=True
+            )
+            used_query, used_folder, total = set(), set(), 0.0
+            for sim, qi, ti in pairs:
+                if qi not in used_query and ti not in used_folder:
+                    used_query.add(qi)
+                    used_folder.add(ti)
+                    total += sim
+
+            # Every folder word must be in the query; long names may miss one in four
+            if len(tokens) - len(used_folder) > len(tokens) // 4:
+                continue
+            # Prefer higher score, then more specific (longer) folder names
+            key = (total / len(tokens), len(tokens), name)
+            if best_key is None or key > best_key:
+                best, best_key = name, key
+
+        return self._exact[best] if best else None
+
+    def paths(self):
+        """
+        Every indexed image path (one per dish folder).
+        """
+        self.refresh()
+        return list(self._exact.values())
+
+    def __len__(self):
+        return len(self._exact)
+
+
+# Lookups against the bundled dish_images/ that must not regress
+# (None: the app shows "Image not available")
+KNOWN_MATCHES = {
+    "Biryani": "briyani",
+    "Chicken Biryani": "briyani",
+    "Spicy Chicken": "spicy_chicken",
+    "Spagetti Pomodoro": "spaghetti_pomodoro",
+    "Thai Spring Roll": "thai_spring_rolls",
+    "Tempura Appetiser": "tempura_appetizer",
+    "Fried Chicken": None,
+    "Fish and Chips": None,
+    "Chicken": None,
+}
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = DishImageIndex(os.path.join(os.path.dirname(os.path.abspath(__file__)), "dish_images"))
+    failures = 0
+    for query, expected in KNOWN_MATCHES.items():
+        path = index.find(query)
+        found = os.path.basename(os.path.dirname(path)) if path else None
+        if found != expected:
+            failures += 1
+            print(f"{query!r}: expected {expected}, got {found}")
+    print(f"{len(KNOWN_MATCHES) - failures}/{len(KNOWN_MATCHES)} known matches")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,145 @@
+import re
+from functools import lru_cache
+
+# Ingredients that imply a common allergen even when the model leaves the
+# allergen list short ("paneer" -> dairy). Keys and words are normalized.
+ALLERGEN_FAMILIES = {
+    "dairy": ("milk", "cream", "butter", "ghee", "cheese", "paneer", "yogurt", "curd", "khoya"),
+    "gluten": ("wheat", "flour", "maida", "atta", "barley", "rye", "semolina", "bread"),
+    "fish": ("salmon", "tuna", "cod", "mackerel", "sardine", "anchovy", "trout", "tilapia",
+             "pomfret", "hilsa", "basa", "haddock", "halibut", "bonito"),
+    "shellfish": ("prawn", "shrimp", "crab", "lobster", "scallop", "mussel", "oyster", "clam",
+                  "crayfish", "langoustine"),
+    "peanut": ("groundnut",),
+    "tree nut": ("nut", "almond", "cashew", "walnut", "pistachio", "hazelnut", "pecan"),
+    "egg": ("omelette", "mayonnaise"),
+    "soy": ("soya", "tofu", "edamame"),
+    "sesame": ("tahini", "til", "gingelly"),
+}
+
+# Compound names whose words suggest the wrong family ("coconut milk" is not
+# dairy): they only count for the families listed here
+COMPOUND_FAMILIES = {
+    "coconut milk": (),
+    "coconut cream": (),
+    "oat milk": (),
+    "rice milk": (),
+    "cocoa butter": (),
+    "almond milk": ("tree nut",),
+    "cashew milk": ("tree nut",),
+    "almond butter": ("tree nut",),
+    "nut butter": ("tree nut",),
+    "soy milk": ("soy",),
+    "soya milk": ("soy",),
+    "peanut butter": ("peanut",),
+}
+
+
+@lru_cache(maxsize=8192)
+def normalize_term(term):
+    """
+    "  Peanuts " -> "peanut": lower case, single spaces, naive singular.
+    """
+    words = re.sub(r"[^\w\s]", " ", str(term).lower()).split()
+    return " ".join(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+                    for w in words)
+
+
+_FAMILY_OF = {}
+for _family, _words in ALLERGEN_FAMILIES.items():
+    _FAMILY_OF[_family] = _family
+    for _word in _words:
+        _FAMILY_OF[_word] = _family
+
+
+@lru_cache(maxsize=8192)
+def _index_keys(name):
+    """
+    Keys one listed name is indexed under: whole term, words, families.
+    """
+    term = normalize_term(name)
+    if not term:
+        return ()
+    words = set(term.split())
+    if term in COMPOUND_FAMILIES:
+        families = set(COMPOUND_FAMILIES[term])
+        # Drop the words that would imply another family ("milk" in "coconut milk")
+        words = {w for w in words if w not in _FAMILY_OF or _FAMILY_OF[w] in families}
+    else:
+        families = {_FAMILY_OF[k] for k in words | {term} if k in _FAMILY_OF}
+    return tuple({term} | words | families)
+
+
+@lru_cache(maxsize=1024)
+def _exclude_keys(term):
+    """
+    Keys an excluded term removes: itself and its family, so avoiding
+    "Milk" also avoids paneer and ghee, and "Nuts" avoids cashews.
+    """
+    term = normalize_term(term)
+    if not term:
+        return ()
+    return (term, _FAMILY_OF[term]) if term in _FAMILY_OF else (term,)
+
+
+class IngredientIndex:
+    """
+    Inverted index from normalized allergens / ingredients to dish ids
+    (positions in the list of Dish objects the index was built from).
+
+    Every term is indexed whole, word by word ("peanut oil" -> "peanut
+    oil", "peanut", "oil") and under its allergen family, so include and
+    exclude filters are set unions / intersections instead of a scan over
+    every dish per query.
+    """
+
+    def __init__(self, dishes):
+        self.size = 0
+        self._terms = {"allergens": {}, "ingredients": {}}
+
+        for dish_id, dish in enumerate(dishes):
+            enrichment = dish.enrichment
+            self._add("allergens", dish_id, enrichment.allergens)
+            self._add("ingredients", dish_id, enrichment.ingredients)
+            self.size += 1
+
+    def _add(self, field, dish_id, names):
+        index = self._terms[field]
+        for name in names:
+            for key in _index_keys(name):
+                index.setdefault(key, set()).add(dish_id)
+
+    def ids(self, term, field=None):
+        """
+        Ids of dishes listing `term` among their allergens, ingredients, or
+        both when `field` is None.
+        """
+        term = normalize_term(term)
+        fields = (field,) if field else ("allergens", "ingredients")
+        found = set()
+        for name in fields:
+            found |= self._terms[name].get(term, set())
+        return found
+
+    def all_of(self, terms, field=None):
+        """
+        Ids of dishes listing every term; None when there are no terms (no
+        constraint), so callers need not materialize every id.
+        """
+        terms = [t for t in terms if normalize_term(t)]
+        if not terms:
+            return None
+        return set.intersection(*(self.ids(t, field) for t in terms))
+
+    def any_of(self, terms, field=None):
+        """
+        Ids of dishes listing at least one of the terms, or anything in the
+        same allergen family (used for exclusions, which must not leak).
+        """
+        fields = (field,) if field else ("allergens", "ingredients")
+        found = set()
+        for term in terms:
+            for key in _exclude_keys(term):
+                for name in fields:
+                    found |= self._terms[name].get(key, set())
+        return found
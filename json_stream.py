@@ -0,0 +1,86 @@
+import json
+
+from llm_client import repair_json
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally parses a streamed JSON array of objects.
+
+    Feed text chunks as they arrive; each call returns the objects that were
+    completed by that chunk. Anything before the opening '[' (such as a
+    ```json fence) is skipped, and a chunk boundary may fall anywhere,
+    including inside strings or escape sequences. An object that is not
+    valid JSON is repaired where possible (see repair_json) or skipped,
+    without affecting the objects after it.
+    """
+
+    def __init__(self):
+        self._buffer = []        # characters of the object being read
+        self._started = False    # seen the top-level '['
+        self._finished = False   # seen the matching ']'
+        self._depth = 0          # nesting depth inside the top-level array
+        self._in_string = False
+        self._escape = False
+        self.objects_parsed = 0
+        self.objects_skipped = 0
+
+    @property
+    def finished(self):
+        return self._finished
+
+    def feed(self, chunk):
+        completed = []
+
+        for ch in chunk:
+            if self._finished:
+                break
+
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+
+            if self._depth == 0:
+                # Between top-level items: only '{' starts an object
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer = [ch]
+                elif ch == "]":
+                    self._finished = True
+                continue
+
+            self._buffer.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    text = "".join(self._buffer)
+                    self._buffer = []
+                    try:
+                        obj = json.loads(text)
+                    except ValueError:
+                        try:
+                            obj = repair_json(text)
+                        except ValueError:
+                            obj = None
+                    if not isinstance(obj, dict):
+                        self.objects_skipped += 1
+                        continue
+                    completed.append(obj)
+                    self.objects_parsed += 1
+
+        return completed
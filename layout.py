@@ -0,0 +1,147 @@
+import re
+from statistics import median
+
+# "250", "₹ 250", "$12.50", "12,50 €", "250/-", "Rs. 250"
+PRICE_RE = re.compile(
+    r"^(?:rs\.?|inr|usd|eur|[₹$€£¥₩])?\s*\d{1,6}(?:[.,]\d{1,2})?\s*(?:/-|[₹$€£¥₩]|rs\.?)?$",
+    re.IGNORECASE
+)
+
+
+class Fragment:
+    __slots__ = ("text", "conf", "x0", "x1", "y0", "y1")
+
+    def __init__(self, box, text, conf):
+        xs = [p[0] for p in box]
+        ys = [p[1] for p in box]
+        self.text = text.strip()
+        self.conf = conf
+        self.x0, self.x1 = min(xs), max(xs)
+        self.y0, self.y1 = min(ys), max(ys)
+
+    @property
+    def cy(self):
+        return (self.y0 + self.y1) / 2
+
+    @property
+    def height(self):
+        return self.y1 - self.y0
+
+    @property
+    def is_price(self):
+        return bool(PRICE_RE.match(self.text))
+
+
+def _is_noise(fragment, min_confidence):
+    text = fragment.text
+    if not text or fragment.conf < min_confidence:
+        return True
+    if not any(ch.isalnum() for ch in text):
+        return True
+    # Stray single letters are almost always OCR debris; single digits may be prices
+    return len(text) == 1 and not text.isdigit()
+
+
+def _split_columns(fragments, page_width, gap):
+    """
+    Group fragments into columns separated by vertical gutters wider than `gap`.
+    Fragments spanning most of the page (titles, banners) do not block gutters.
+    """
+    narrow = [f for f in fragments if f.x1 - f.x0 < 0.6 * page_width]
+    spans = []
+    for f in sorted(narrow, key=lambda f: f.x0):
+        if spans and f.x0 - spans[-1][1] <= gap:
+            spans[-1][1] = max(spans[-1][1], f.x1)
+        else:
+            spans.append([f.x0, f.x1])
+
+    if len(spans) <= 1:
+        return [fragments]
+
+    columns = [[] for _ in spans]
+    for f in narrow:
+        center = (f.x0 + f.x1) / 2
+        idx = 0
+        for i, (start, _) in enumerate(spans):
+            if center >= start:
+                idx = i
+        columns[idx].append(f)
+
+    # A column of (almost) only prices is the price side of the column to its
+    # left, not a separate menu column
+    merged = []
+    for column in columns:
+        prices = sum(1 for f in column if f.is_price)
+        if merged and prices >= 0.8 * len(column):
+            merged[-1].extend(column)
+        else:
+            merged.append(column)
+
+    # Page-wide titles are read first, with the left-most column
+    merged[0].extend(f for f in fragments if f.x1 - f.x0 >= 0.6 * page_width)
+    return merged
+
+
+def _group_rows(fragments, tolerance):
+    rows = []
+    for f in sorted(fragments, key=lambda f: f.cy):
+        if rows and abs(f.cy - rows[-1]["cy"]) <= tolerance:
+            row = rows[-1]
+            row["items"].append(f)
+            row["cy"] = sum(i.cy for i in row["items"]) / len(row["items"])
+        else:
+            rows.append({"cy": f.cy, "items": [f]})
+    return [sorted(r["items"], key=lambda f: f.x0) for r in rows]
+
+
+def _row_to_entry(row):
+    """
+    (name, price) for a row; either side may be None.
+    """
+    names = [f.text for f in row if not f.is_price]
+    prices = [f.text for f in row if f.is_price]
+    name = " ".join(names) or None
+    # The right-most price is the one a dish line points at
+    price = prices[-1] if prices else None
+    return name, price
+
+
+def layout_entries(ocr_results, min_confidence=0.3):
+    """
+    EasyOCR `readtext(detail=1)` output -> list of (name, price) entries in
+    reading order (column by column, top to bottom).
+
+    Prices on their own line directly under a name are paired with it.
+    """
+    fragments = [Fragment(box, text, conf) for box, text, conf in ocr_results]
+    fragments = [f for f in fragments if not _is_noise(f, min_confidence)]
+    if not fragments:
+        return []
+
+    line_height = median(f.height for f in fragments) or 1
+    page_width = max(f.x1 for f in fragments) - min(f.x0 for f in fragments) or 1
+
+    entries = []
+    for column in _split_columns(fragments, page_width, gap=2 * line_height):
+        for row in _group_rows(column, tolerance=0.5 * line_height):
+            name, price = _row_to_entry(row)
+            if name is None and price is not None and entries \
+                    and entries[-1][0] is not None and entries[-1][1] is None:
+                entries[-1] = (entries[-1][0], price)
+            else:
+                entries.append((name, price))
+    return entries
+
+
+def layout_text(ocr_results, min_confidence=0.3):
+    """
+    Compact line-structured text: one line per menu row, "name | price" when a
+    price was found on (or just below) the row.
+    """
+    lines = []
+    for name, price in layout_entries(ocr_results, min_confidence):
+        if name and price:
+            lines.append(f"{name} | {price}")
+        else:
+            lines.append(name or price)
+    return "\n".join(lines)
@@ -0,0 +1,427 @@
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Errors worth retrying: quota (429), server trouble (5xx), timeouts, dropped
+# connections. Matched by name so google.api_core stays an implementation detail.
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "Aborted", "Unknown",
+    "TimeoutError", "ConnectionError", "ConnectionResetError", "RemoteDisconnected",
+    "URLError",
+}
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Quota errors are routine: back off and retry, but they say nothing about
+# whether the service is up, so they never trip the circuit breaker.
+QUOTA_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+def is_retryable(error):
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)
+    return code in RETRYABLE_STATUS
+
+
+def is_quota_error(error):
+    if type(error).__name__ in QUOTA_ERRORS:
+        return True
+    code = getattr(error, "code", None)
+    return getattr(code, "value", code) == 429
+
+
+class TokenBucket:
+    """
+    Allows `rate` calls per second on average, with bursts up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, deadline=None):
+        """
+        Take one token, waiting for it if needed. Returns False if it would
+        not be available before `deadline` (a clock() time).
+        """
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            self._sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing service: after `failure_threshold` consecutive
+    failures the circuit opens and calls fail fast for `reset_timeout`
+    seconds, then a single trial call decides whether it closes again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError while open. Returns True when this call is the
+        half-open trial; the caller must then end it with record_success(),
+        record_failure() or end_trial().
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            remaining = self.reset_timeout - (self._clock() - self._opened_at)
+            if remaining > 0 or self._trial_running:
+                raise CircuitOpenError(
+                    f"Gemini circuit open after {self._failures} failures; "
+                    f"retrying in {max(remaining, 0):.1f}s"
+                )
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+    def end_trial(self):
+        """
+        A trial that ended without success (any error, or abandoned) keeps
+        the circuit open for another reset_timeout.
+        """
+        with self._lock:
+            if self._trial_running:
+                self._trial_running = False
+                self._opened_at = self._clock()
+
+
+def _strip_fences(text):
+    text = re.sub(r"```(?:json)?", "", text or "").strip()
+    starts = [i for i in (text.find("["), text.find("{")) if i >= 0]
+    return text[min(starts):] if starts else text
+
+
+def _close_truncated_array(text, max_attempts=3):
+    """
+    A top-level array cut off mid-item -> the complete items before the cut.
+    """
+    if not text.startswith("["):
+        return None
+
+    cuts = []
+    depth, in_string, escape = 0, False, False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth == 1:
+                cuts.append(i + 1)
+        elif ch == "," and depth == 1:
+            cuts.append(i)
+
+    for cut in reversed(cuts[-max_attempts:]):
+        try:
+            return json.loads(text[:cut] + "]")
+        except ValueError:
+            continue
+    return None
+
+
+def parse_model_json(text):
+    """
+    (value, complete) for model output that may be fenced, have trailing
+    commas or be cut off mid-array. `complete` is False when a truncated
+    array had to be cut back to its finished items. Raises ValueError if
+    nothing usable is left.
+    """
+    text = _strip_fences(text)
+    try:
+        return json.loads(text), True
+    except ValueError:
+        pass
+
+    text = re.sub(r",\s*([\]}])", r"\1", text)
+    try:
+        return json.loads(text), True
+    except ValueError:
+        pass
+
+    salvaged = _close_truncated_array(text)
+    if salvaged is not None:
+        return salvaged, False
+    raise ValueError(f"unparseable model output: {text[:80]!r}")
+
+
+def repair_json(text):
+    """
+    Parse model output that may be fenced, have trailing commas or be cut
+    off mid-array. Raises ValueError if nothing usable is left.
+    """
+    return parse_model_json(text)[0]
+
+
+class GeminiHTTPError(RuntimeError):
+    def __init__(self, code, message):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+class _Text:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class HTTPGeminiModel:
+    """
+    Minimal Gemini REST model (generateContent / streamGenerateContent over
+    SSE) with the genai generate_content interface. Used when
+    GEMINI_BASE_URL points at another endpoint, such as fake_gemini.
+    """
+
+    def __init__(self, model_name, base_url, api_key=None):
+        self.model_name = model_name
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+
+    def _request(self, method, prompt, timeout, query=""):
+        url = f"{self.base_url}/v1beta/models/{self.model_name}:{method}{query}"
+        body = json.dumps({"contents": [{"role": "user", "parts": [{"text": prompt}]}]})
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["x-goog-api-key"] = self.api_key
+        request = urllib.request.Request(url, data=body.encode("utf-8"), headers=headers)
+        try:
+            return urllib.request.urlopen(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read())["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = e.reason
+            raise GeminiHTTPError(e.code, message) from None
+
+    @staticmethod
+    def _text(payload):
+        parts = payload["candidates"][0]["content"]["parts"]
+        return "".join(part.get("text", "") for part in parts)
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        timeout = (request_options or {}).get("timeout", 60)
+        if stream:
+            return self._stream(prompt, timeout)
+        with self._request("generateContent", prompt, timeout) as response:
+            return _Text(self._text(json.loads(response.read())))
+
+    def _stream(self, prompt, timeout):
+        with self._request("streamGenerateContent", prompt, timeout, "?alt=sse") as response:
+            for line in response:
+                line = line.strip()
+                if line.startswith(b"data:"):
+                    yield _Text(self._text(json.loads(line[5:])))
+
+
+class GeminiClient:
+    """
+    Guarded access to a Gemini model: a token-bucket rate limit, retries
+    with jittered exponential backoff for transient errors, a deadline per
+    call (covering waits and retries) and a circuit breaker shared by all
+    callers of the same model.
+
+    `model` is anything with a genai-style `generate_content(prompt,
+    stream=..., request_options=...)`, e.g. genai.GenerativeModel or
+    HTTPGeminiModel.
+    """
+
+    def __init__(self, model, requests_per_minute=60, burst=10, max_retries=4,
+                 base_delay=0.5, max_delay=20.0, deadline=90.0, attempt_timeout=60.0,
+                 breaker=None, clock=time.monotonic, sleep=time.sleep):
+        self.model = model
+        self.limiter = TokenBucket(requests_per_minute / 60.0, burst, clock=clock, sleep=sleep)
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self._clock = clock
+        self._sleep = sleep
+        self.calls = 0
+        self.retries = 0
+
+    def _backoff(self, attempt):
+        # "Full jitter": spreads retries from many workers hitting the same quota
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _attempts(self, deadline):
+        """
+        Yields (attempt, timeout, deadline_at) until attempts or time run
+        out; callers report failures through _failed() and `continue`.
+        """
+        deadline_at = self._clock() + (deadline if deadline is not None else self.deadline)
+        for attempt in range(self.max_retries + 1):
+            if not self.limiter.acquire(deadline=deadline_at):
+                raise DeadlineExceededError("Gemini call deadline passed waiting for rate limit")
+            remaining = deadline_at - self._clock()
+            if remaining <= 0:
+                raise DeadlineExceededError("Gemini call deadline exceeded")
+            self.calls += 1
+            yield attempt, min(self.attempt_timeout, remaining), deadline_at
+
+    def _failed(self, error, attempt, deadline_at):
+        """
+        Back off after a failed attempt; re-raise unless it is worth another try.
+        """
+        if not is_retryable(error) or attempt >= self.max_retries:
+            raise error
+        delay = self._backoff(attempt)
+        if self._clock() + delay >= deadline_at:
+            raise error
+        self.retries += 1
+        self._sleep(delay)
+
+    def _call_failed(self, error):
+        # One breaker failure per call (not per attempt), and none for quota
+        if is_retryable(error) and not is_quota_error(error):
+            self.breaker.record_failure()
+
+    def generate(self, prompt, deadline=None):
+        """
+        Response text for `prompt`.
+        """
+        trial = self.breaker.before_call()
+        try:
+            for attempt, timeout, deadline_at in self._attempts(deadline):
+                try:
+                    response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+                    text = response.text
+                except Exception as e:
+                    self._failed(e, attempt, deadline_at)
+                    continue
+                self.breaker.record_success()
+                return text
+        except Exception as e:
+            self._call_failed(e)
+            raise
+        finally:
+            if trial:
+                self.breaker.end_trial()
+
+    def stream(self, prompt, deadline=None):
+        """
+        Yields response text chunks. Failures before the first chunk are
+        retried like generate(); once text has been yielded an error is
+        raised to the caller, which already holds a partial response.
+        """
+        trial = self.breaker.before_call()
+        try:
+            for attempt, timeout, deadline_at in self._attempts(deadline):
+                started = False
+                try:
+                    for chunk in self.model.generate_content(
+                            prompt, stream=True, request_options={"timeout": timeout}):
+                        if not started:
+                            # First text back: the service is answering
+                            started = True
+                            self.breaker.record_success()
+                        yield chunk.text
+                except Exception as e:
+                    if started:
+                        raise
+                    self._failed(e, attempt, deadline_at)
+                    continue
+                if not started:
+                    self.breaker.record_success()
+                return
+        except Exception as e:
+            self._call_failed(e)
+            raise
+        finally:
+            # Also runs when the consumer abandons the stream (GeneratorExit)
+            if trial:
+                self.breaker.end_trial()
+
+    def stats(self):
+        return {"calls": self.calls, "retries": self.retries, "circuit": self.breaker.state}
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_gemini_client(model_name, model, **settings):
+    """
+    Process-wide client per model object, so every processor sharing a
+    model shares one rate limit and circuit breaker (a different model
+    under the same name, e.g. a stub, gets its own client). `settings`
+    only apply on first creation.
+    """
+    key = (model_name, id(model))
+    with _clients_lock:
+        client = _clients.get(key)
+        # id() can be reused once a model is garbage collected
+        if client is None or client.model is not model:
+            client = _clients[key] = GeminiClient(model, **settings)
+        return client
@@ -0,0 +1,97 @@
+import heapq
+from bisect import bisect_left, insort
+
+
+def _prune_dominated(options, keep):
+    """
+    Drop options that at least `keep` other options beat on both score and
+    price: they can never appear in the top `keep` meals.
+
+    `options` is a list of (score, price, ref); returns them best score first.
+    """
+    kept = []
+    best_scores = []  # ascending, at most `keep` highest scores seen so far
+    for score, price, ref in sorted(options, key=lambda o: (o[1], -o[0])):
+        dominated_by = len(best_scores) - bisect_left(best_scores, score)
+        if dominated_by < keep:
+            kept.append((score, price, ref))
+        insort(best_scores, score)
+        if len(best_scores) > keep:
+            best_scores.pop(0)
+    kept.sort(key=lambda o: (-o[0], o[1]))
+    return kept
+
+
+def optimize_meal(courses, budget, top_n=3, optional=()):
+    """
+    Branch-and-bound search for the best meals: one option per course,
+    maximizing total score with total price <= budget.
+
+    `courses` maps course name -> list of (score, price, ref). Courses with
+    no option within budget are skipped, as are the `optional` courses
+    whenever leaving them out scores better or is the only way to fit.
+    Returns up to `top_n` meals, best first, as (total_score, total_price,
+    {course: ref}).
+    """
+    top_n = max(1, top_n)
+    levels = []
+    for course, options in courses.items():
+        affordable = [o for o in options if o[1] <= budget]
+        if not affordable:
+            continue
+        if course in optional:
+            # Skipping the course is one more (free, neutral) option
+            affordable.append((0, 0.0, None))
+        levels.append((course, _prune_dominated(affordable, top_n)))
+
+    if not levels:
+        return []
+
+    # Most constrained course first keeps the search tree narrow
+    levels.sort(key=lambda level: len(level[1]))
+
+    # Optimistic score / cheapest price for everything after each level
+    best_rest = [0] * (len(levels) + 1)
+    cheapest_rest = [0.0] * (len(levels) + 1)
+    for i in range(len(levels) - 1, -1, -1):
+        options = levels[i][1]
+        best_rest[i] = best_rest[i + 1] + options[0][0]
+        cheapest_rest[i] = cheapest_rest[i + 1] + min(o[1] for o in options)
+
+    found = []  # min-heap of (score, -price, counter, picks)
+    counter = 0
+    picks = []
+
+    def search(level, score, price):
+        nonlocal counter
+
+        if level == len(levels):
+            counter += 1
+            entry = (score, -price, -counter, list(picks))
+            if len(found) < top_n:
+                heapq.heappush(found, entry)
+            elif entry > found[0]:
+                heapq.heapreplace(found, entry)
+            return
+
+        options = levels[level][1]
+        for option_score, option_price, ref in options:
+            meal_price = price + option_price
+            if meal_price + cheapest_rest[level + 1] > budget:
+                continue
+            # Options are sorted by score, so once the bound fails it fails
+            # for every remaining option at this level
+            if len(found) == top_n and score + option_score + best_rest[level + 1] < found[0][0]:
+                break
+            picks.append((levels[level][0], ref))
+            search(level + 1, score + option_score, meal_price)
+            picks.pop()
+
+    search(0, 0, 0.0)
+
+    meals = []
+    for total_score, neg_price, _, meal_picks in sorted(found, reverse=True):
+        picked = {course: ref for course, ref in meal_picks if ref is not None}
+        if picked:
+            meals.append((total_score, -neg_price, picked))
+    return meals
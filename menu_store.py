@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from models import Dish
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menus (
+    id INTEGER PRIMARY KEY,
+    image_hash TEXT NOT NULL,
+    version TEXT NOT NULL DEFAULT '',
+    restaurant TEXT,
+    created_at REAL NOT NULL,
+    UNIQUE (image_hash, version)
+);
+CREATE INDEX IF NOT EXISTS menus_restaurant ON menus (restaurant);
+
+CREATE TABLE IF NOT EXISTS dishes (
+    id INTEGER PRIMARY KEY,
+    menu_id INTEGER NOT NULL REFERENCES menus (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    dish_name TEXT NOT NULL,
+    course_type TEXT,
+    cuisine TEXT,
+    price REAL,
+    currency TEXT,
+    is_veg INTEGER NOT NULL,
+    spice_level TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dishes_menu ON dishes (menu_id, position);
+CREATE INDEX IF NOT EXISTS dishes_course ON dishes (course_type, is_veg, price);
+CREATE INDEX IF NOT EXISTS dishes_cuisine ON dishes (cuisine);
+CREATE INDEX IF NOT EXISTS dishes_price ON dishes (currency, price);
+CREATE INDEX IF NOT EXISTS dishes_spice ON dishes (spice_level);
+"""
+
+
+def _row(menu_id, position, dish):
+    enrichment = dish.enrichment
+    return (
+        menu_id,
+        position,
+        dish.dish_name,
+        dish.course_type,
+        (enrichment.cuisine or "").lower() or None,
+        dish.price,
+        dish.currency,
+        int(enrichment.is_veg),
+        enrichment.spice_level,
+        json.dumps(dish.to_dict(), ensure_ascii=False),
+    )
+
+
+class MenuStore:
+    """
+    SQLite store of structured (canonical) menus, keyed by image hash and
+    a processing version, optionally tagged with a restaurant.
+
+    Dishes keep their full JSON plus indexed columns for course, cuisine,
+    price, veg flag and spice level, so candidate queries never scan or
+    decode the whole table. One connection is shared behind a lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            # Readers don't block the writer (Streamlit reruns overlap)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    # ------------------------------
+    # Writing
+    # ------------------------------
+    def save_menu(self, image_hash, dishes, restaurant=None, version=""):
+        """
+        Store (or replace) one menu. Returns its id.
+        """
+        return self.save_menus([(image_hash, dishes, restaurant)], version=version)[0]
+
+    def save_menus(self, menus, version=""):
+        """
+        Store many (image_hash, dishes, restaurant) menus in one transaction,
+        with all dish rows inserted in a single batch. Returns the menu ids.
+        """
+        ids = []
+        rows = []
+        now = time.time()
+        with self._lock, self._conn:
+            for image_hash, dishes, restaurant in menus:
+                # Replacing drops the old dish rows through the cascade
+                self._conn.execute(
+                    "DELETE FROM menus WHERE image_hash = ? AND version = ?",
+                    (image_hash, version)
+                )
+                menu_id = self._conn.execute(
+                    "INSERT INTO menus (image_hash, version, restaurant, created_at) VALUES (?, ?, ?, ?)",
+                    (image_hash, version, restaurant, now)
+                ).lastrowid
+                ids.append(menu_id)
+                rows.extend(_row(menu_id, position, dish) for position, dish in enumerate(dishes))
+
+            self._conn.executemany(
+                "INSERT INTO dishes (menu_id, position, dish_name, course_type, cuisine, price,"
+                " currency, is_veg, spice_level, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return ids
+
+    # ------------------------------
+    # Reading
+    # ------------------------------
+    def get_menu(self, image_hash, version=""):
+        """
+        Stored dishes for an image, in menu order, or None if not stored.
+        """
+        with self._lock:
+            menu = self._conn.execute(
+                "SELECT id FROM menus WHERE image_hash = ? AND version = ?",
+                (image_hash, version)
+            ).fetchone()
+            if menu is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT data FROM dishes WHERE menu_id = ? ORDER BY position",
+                (menu[0],)
+            ).fetchall()
+        return [Dish.from_dict(json.loads(data)) for (data,) in rows]
+
+    def query_dishes(self, courses=None, is_veg=None, cuisines=None, max_price=None,
+                     currency=None, spice_levels=None, restaurant=None, image_hashes=None,
+                     version=None, limit=None):
+        """
+        Dishes matching every given filter, in stored menu order. Each filter
+        is an indexed column; `max_price` only applies within `currency`
+        (prices are stored as listed). Cuisines match case-insensitively.
+        `version` keeps only menus stored under that processing version.
+        """
+        where, params = [], []
+
+        def any_of(column, values):
+            values = list(values)
+            where.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+        if courses is not None:
+            any_of("d.course_type", courses)
+        if is_veg is not None:
+            where.append("d.is_veg = ?")
+            params.append(int(is_veg))
+        if cuisines is not None:
+            any_of("d.cuisine", (c.lower() for c in cuisines))
+        if currency is not None:
+            where.append("d.currency = ?")
+            params.append(currency)
+        if max_price is not None:
+            where.append("d.price <= ?")
+            params.append(max_price)
+        if spice_levels is not None:
+            any_of("d.spice_level", spice_levels)
+        if restaurant is not None:
+            where.append("m.restaurant = ?")
+            params.append(restaurant)
+        if image_hashes is not None:
+            any_of("m.image_hash", image_hashes)
+        if version is not None:
+            where.append("m.version = ?")
+            params.append(version)
+
+        sql = "SELECT d.data FROM dishes d JOIN menus m ON m.id = d.menu_id"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY d.menu_id, d.position"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [Dish.from_dict(json.loads(data)) for (data,) in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
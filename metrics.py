@@ -0,0 +1,247 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket bounds (seconds) shared by every stage
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Series:
+    __slots__ = ("count", "total", "max", "buckets", "recent")
+
+    def __init__(self, recent):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent = deque(maxlen=recent)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+class Metrics:
+    """
+    Process-wide timings and counters for the menu pipeline.
+
+    `span(stage)` times a block, `observe(name, value)` records a sample
+    (e.g. dishes per page) and `count(name, n)` bumps a counter; all take
+    optional labels. Every record is also appended to `jsonl_path` when
+    set. Collectors add gauges computed at export time (cache hit rates).
+    """
+
+    def __init__(self, jsonl_path=None, recent=1000):
+        self.jsonl_path = jsonl_path
+        self._recent = recent
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._samples = {}
+        self._counters = {}
+        self._collectors = []
+
+    # ------------------------------
+    # Recording
+    # ------------------------------
+    def _write(self, record):
+        if not self.jsonl_path:
+            return
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def _add(self, table, name, labels, value):
+        with self._lock:
+            series = table.get((name, _label_key(labels)))
+            if series is None:
+                series = table[(name, _label_key(labels))] = _Series(self._recent)
+            series.add(value)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self._add(self._spans, stage, labels, seconds)
+            self._write({"ts": time.time(), "type": "span", "name": stage, "seconds": seconds, **labels})
+
+    def observe(self, name, value, **labels):
+        self._add(self._samples, name, labels, value)
+        self._write({"ts": time.time(), "type": "sample", "name": name, "value": value, **labels})
+
+    def count(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._write({"ts": time.time(), "type": "count", "name": name, "value": value, **labels})
+
+    def add_collector(self, fn):
+        """
+        `fn()` -> {(gauge_name, ((label, value), ...)): value}, called at export.
+        """
+        with self._lock:
+            self._collectors.append(fn)
+
+    # ------------------------------
+    # Reading / export
+    # ------------------------------
+    def summary(self):
+        """
+        Plain-dict snapshot for the debug panel.
+        """
+        with self._lock:
+            spans = [
+                {
+                    "stage": name + _format_labels(key),
+                    "count": s.count,
+                    "avg_ms": round(s.total / s.count * 1000, 1),
+                    "p95_ms": round(_percentile(s.recent, 0.95) * 1000, 1),
+                    "max_ms": round(s.max * 1000, 1),
+                    "total_s": round(s.total, 3),
+                }
+                for (name, key), s in sorted(self._spans.items())
+            ]
+            samples = [
+                {"name": name + _format_labels(key), "count": s.count,
+                 "avg": round(s.total / s.count, 2), "max": s.max}
+                for (name, key), s in sorted(self._samples.items())
+            ]
+            counters = {name + _format_labels(key): value for (name, key), value in sorted(self._counters.items())}
+            collectors = list(self._collectors)
+        gauges = {}
+        for fn in collectors:
+            for (name, key), value in fn().items():
+                gauges[name + _format_labels(key)] = value
+        return {"spans": spans, "samples": samples, "counters": counters, "gauges": gauges}
+
+    def to_prometheus(self, prefix="menu"):
+        """
+        Prometheus text exposition format (histograms, counters, gauges).
+        """
+        lines = []
+        with self._lock:
+            # Stage timings share one histogram family, labelled by stage
+            if self._spans:
+                full = f"{prefix}_stage_seconds"
+                lines.append(f"# TYPE {full} histogram")
+                for (name, key), s in sorted(self._spans.items()):
+                    base = (("stage", name),) + key
+                    for bound, n in zip(BUCKETS, s.buckets):
+                        lines.append(f"{full}_bucket{_format_labels(base, (('le', bound),))} {n}")
+                    lines.append(f"{full}_bucket{_format_labels(base, (('le', '+Inf'),))} {s.count}")
+                    lines.append(f"{full}_sum{_format_labels(base)} {s.total}")
+                    lines.append(f"{full}_count{_format_labels(base)} {s.count}")
+
+            # Other samples are not durations; export them as summaries
+            family = None
+            for (name, key), s in sorted(self._samples.items()):
+                if name != family:
+                    family = name
+                    lines.append(f"# TYPE {prefix}_{name} summary")
+                lines.append(f"{prefix}_{name}_sum{_format_labels(key)} {s.total}")
+                lines.append(f"{prefix}_{name}_count{_format_labels(key)} {s.count}")
+
+            counters = sorted(self._counters.items())
+            collectors = list(self._collectors)
+
+        gauges = {}
+        for fn in collectors:
+            gauges.update(fn())
+
+        # One TYPE line per metric family, then every labelled series
+        for kind, suffix, series in (("counter", "_total", counters), ("gauge", "", sorted(gauges.items()))):
+            family = None
+            for (name, key), value in series:
+                if name != family:
+                    family = name
+                    lines.append(f"# TYPE {prefix}_{name}{suffix} {kind}")
+                lines.append(f"{prefix}_{name}{suffix}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="0.0.0.0"):
+        """
+        Serve to_prometheus() at http://host:port/metrics from a daemon thread.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    The process-wide Metrics. MENU_METRICS_JSONL sets the JSON lines file
+    and MENU_METRICS_PORT starts the Prometheus endpoint.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(jsonl_path=os.environ.get("MENU_METRICS_JSONL"))
+            port = os.environ.get("MENU_METRICS_PORT")
+            if port:
+                _metrics.serve(int(port))
+        return _metrics
+
+
+def timed(stage, **labels):
+    """
+    Decorator: time every call of the function as `stage`.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_metrics().span(stage, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from llm_client import HTTPGeminiModel
+from metrics import get_metrics
+
+
+def _load_reader(languages):
+    # Imported on first use: easyocr pulls in torch, which dominates startup
+    import easyocr
+    return easyocr.Reader(list(languages))
+
+
+def _load_model(model_name):
+    base_url = os.environ.get("GEMINI_BASE_URL")
+    if base_url:
+        # Another Gemini-compatible endpoint, e.g. a local fake_gemini server
+        return HTTPGeminiModel(model_name, base_url, api_key=os.environ.get("GEMINI_API_KEY"))
+    import google.generativeai as genai
+    return genai.GenerativeModel(model_name)
+
+
+def _language_key(languages):
+    if isinstance(languages, str):
+        languages = [languages]
+    return tuple(sorted(set(languages)))
+
+
+class ModelPool:
+    """
+    Process-wide pool of warm EasyOCR readers and Gemini models.
+
+    Readers are expensive to load (detector + recognizer weights), so they are
+    created once per language set and handed out to callers. At most
+    `max_readers_per_key` readers exist per language set; callers wait for a
+    free one instead of loading another copy. When more than
+    `max_language_sets` language sets are loaded, the least recently used set
+    with no readers checked out is dropped.
+    """
+
+    def __init__(self, max_readers_per_key=1, max_language_sets=4,
+                 reader_factory=None, model_factory=None):
+        self.max_readers_per_key = max(1, max_readers_per_key)
+        self.max_language_sets = max(1, max_language_sets)
+        self._reader_factory = reader_factory or _load_reader
+        self._model_factory = model_factory or _load_model
+
+        self._cond = threading.Condition()
+        self._idle = OrderedDict()   # language key -> idle readers, LRU order
+        self._size = {}              # language key -> readers created
+        self._models = {}
+        self._stats = {
+            "cold_loads": 0,
+            "cold_seconds": 0.0,
+            "warm_hits": 0,
+            "warm_seconds": 0.0,
+            "evictions": 0,
+        }
+
+    # ------------------------------
+    # OCR readers
+    # ------------------------------
+    @contextmanager
+    def reader(self, languages=("en",)):
+        """
+        Check out a warm reader for `languages`, loading one on first use.
+        """
+        key = _language_key(languages)
+        reader = self._checkout(key)
+        try:
+            yield reader
+        finally:
+            self._checkin(key, reader)
+
+    def warm_up(self, languages=("en",)):
+        """
+        Load a reader ahead of the first request.
+        """
+        with self.reader(languages):
+            pass
+
+    def _checkout(self, key):
+        start = time.perf_counter()
+
+        with self._cond:
+            while True:
+                idle = self._idle.get(key)
+                if idle:
+                    reader = idle.pop()
+                    self._idle.move_to_end(key)
+                    self._stats["warm_hits"] += 1
+                    self._stats["warm_seconds"] += time.perf_counter() - start
+                    return reader
+
+                if self._size.get(key, 0) < self.max_readers_per_key:
+                    # Reserve the slot, then load outside the lock so other
+                    # language sets are not blocked by a slow cold start.
+                    self._size[key] = self._size.get(key, 0) + 1
+                    self._idle.setdefault(key, [])
+                    self._idle.move_to_end(key)
+                    self._evict_language_sets(keep=key)
+                    break
+
+                self._cond.wait()
+
+        try:
+            reader = self._reader_factory(key)
+        except Exception:
+            with self._cond:
+                self._size[key] -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._stats["cold_loads"] += 1
+            self._stats["cold_seconds"] += time.perf_counter() - start
+
+        return reader
+
+    def _checkin(self, key, reader):
+        with self._cond:
+            if key in self._size:
+                self._idle.setdefault(key, []).append(reader)
+                self._idle.move_to_end(key)
+            self._cond.notify_all()
+
+    def _evict_language_sets(self, keep):
+        for key in list(self._idle):
+            if len(self._size) <= self.max_language_sets:
+                return
+            if key == keep:
+                continue
+            # Only drop sets whose readers are all back in the pool
+            if len(self._idle[key]) == self._size.get(key, 0):
+                del self._idle[key]
+                del self._size[key]
+                self._stats["evictions"] += 1
+
+    # ------------------------------
+    # Gemini models
+    # ------------------------------
+    def model(self, model_name):
+        """
+        Return the shared GenerativeModel for `model_name`.
+        """
+        with self._cond:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._model_factory(model_name)
+                self._models[model_name] = model
+            return model
+
+    # ------------------------------
+    # Metrics
+    # ------------------------------
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["language_sets"] = {
+                "+".join(key): size for key, size in self._size.items()
+            }
+
+        stats["avg_cold_seconds"] = (
+            stats["cold_seconds"] / stats["cold_loads"] if stats["cold_loads"] else 0.0
+        )
+        stats["avg_warm_seconds"] = (
+            stats["warm_seconds"] / stats["warm_hits"] if stats["warm_hits"] else 0.0
+        )
+        return stats
+
+
+def _pool_gauges(pool):
+    stats = pool.stats()
+    gauges = {
+        (f"model_pool_{name}", ()): stats[name]
+        for name in ("cold_loads", "warm_hits", "evictions", "avg_cold_seconds", "avg_warm_seconds")
+    }
+    for languages, size in stats["language_sets"].items():
+        gauges[("model_pool_readers", (("languages", languages),))] = size
+    return gauges
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_model_pool():
+    """
+    Return the pool shared by every MenuProcessor in this process.
+    """
+    global _default_pool
+
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ModelPool()
+            get_metrics().add_collector(lambda pool=_default_pool: _pool_gauges(pool))
+        return _default_pool
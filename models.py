@@ -0,0 +1,208 @@
+from currency import parse_price
+
+COURSES = ("Starter", "Main Course", "Dessert", "Beverage")
+SPICE_LEVELS = ("Low", "Medium", "High")
+
+_COURSE_ALIASES = {
+    "starter": "Starter", "starters": "Starter", "appetizer": "Starter", "appetiser": "Starter",
+    "main": "Main Course", "main course": "Main Course", "mains": "Main Course", "entree": "Main Course",
+    "dessert": "Dessert", "desserts": "Dessert", "sweet": "Dessert",
+    "beverage": "Beverage", "beverages": "Beverage", "drink": "Beverage", "drinks": "Beverage",
+}
+_SPICE_ALIASES = {
+    "low": "Low", "mild": "Low", "none": "Low",
+    "medium": "Medium", "moderate": "Medium",
+    "high": "High", "hot": "High", "spicy": "High", "very spicy": "High",
+}
+_TRUE = {"true", "yes", "y", "1", "veg", "vegetarian", "vegan"}
+_FALSE = {"false", "no", "n", "0", "non-veg", "non veg", "nonveg", "non-vegetarian"}
+
+
+def _text(value):
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+    return False
+
+
+def _names(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [name for name in (_text(v) for v in value) if name]
+
+
+class Enrichment:
+    """
+    AI-guessed metadata for a dish, coerced to canonical types.
+    """
+
+    __slots__ = ("cuisine", "region", "spice_level", "is_veg", "calories_approx",
+                 "allergens", "ingredients")
+
+    def __init__(self, cuisine=None, region=None, spice_level="Medium", is_veg=False,
+                 calories_approx=0, allergens=(), ingredients=()):
+        self.cuisine = cuisine
+        self.region = region
+        self.spice_level = spice_level
+        self.is_veg = is_veg
+        self.calories_approx = calories_approx
+        self.allergens = list(allergens)
+        self.ingredients = list(ingredients)
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            data = {}
+
+        spice = _text(data.get("spice_level"))
+        # A missing value counts as 0 kcal, as the scoring rules always had
+        # it; an explicit null (or no number at all) stays unknown
+        calories = parse_price(data.get("calories_approx", 0))
+
+        return cls(
+            cuisine=_text(data.get("cuisine")),
+            region=_text(data.get("region")),
+            # Missing spice counts as Medium; unknown wording is kept as given
+            spice_level=_SPICE_ALIASES.get(spice.lower(), spice) if spice else "Medium",
+            is_veg=_flag(data.get("is_veg")),
+            calories_approx=int(round(calories)) if calories is not None else None,
+            allergens=_names(data.get("allergens")),
+            ingredients=_names(data.get("ingredients")),
+        )
+
+    def to_dict(self):
+        return {
+            "cuisine": self.cuisine,
+            "region": self.region,
+            "spice_level": self.spice_level,
+            "is_veg": self.is_veg,
+            "calories_approx": self.calories_approx,
+            "allergens": list(self.allergens),
+            "ingredients": list(self.ingredients),
+        }
+
+
+class Dish:
+    """
+    One validated menu item. Built once from the model's JSON; everything
+    downstream reads plain attributes instead of re-checking dict keys.
+    """
+
+    __slots__ = ("dish_name", "translated_name", "language_original", "description",
+                 "price", "currency", "original_price", "original_currency",
+                 "course_type", "enrichment")
+
+    def __init__(self, dish_name, translated_name=None, language_original="Unknown",
+                 description=None, price=None, currency=None, original_price=None,
+                 original_currency=None, course_type=None, enrichment=None):
+        self.dish_name = dish_name
+        self.translated_name = translated_name
+        self.language_original = language_original
+        self.description = description
+        self.price = price
+        self.currency = currency
+        self.original_price = original_price
+        self.original_currency = original_currency
+        self.course_type = course_type
+        self.enrichment = enrichment if enrichment is not None else Enrichment()
+
+    @classmethod
+    def from_dict(cls, data, strict=True):
+        """
+        Validate and coerce one dish dict. Raises ValueError if it is not a
+        usable dish (not an object, error entry, or no name). With
+        strict=False only the type check applies and a missing name is "".
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"dish must be an object, got {type(data).__name__}")
+        if strict and "error" in data:
+            raise ValueError(str(data["error"]))
+
+        dish_name = _text(data.get("dish_name")) or _text(data.get("translated_name"))
+        if dish_name is None:
+            if strict:
+                raise ValueError("dish has no name")
+            dish_name = ""
+
+        course = _text(data.get("course_type"))
+
+        return cls(
+            dish_name=dish_name,
+            translated_name=_text(data.get("translated_name")),
+            language_original=_text(data.get("language_original")) or "Unknown",
+            description=_text(data.get("description")),
+            price=parse_price(data.get("price")),
+            currency=_text(data.get("currency")),
+            original_price=parse_price(data.get("original_price")),
+            original_currency=_text(data.get("original_currency")),
+            course_type=_COURSE_ALIASES.get(course.lower(), course) if course else None,
+            enrichment=Enrichment.from_dict(data.get("enrichment")),
+        )
+
+    def to_dict(self):
+        data = {
+            "dish_name": self.dish_name,
+            "translated_name": self.translated_name,
+            "language_original": self.language_original,
+            "description": self.description,
+            "price": self.price,
+            "currency": self.currency,
+            "course_type": self.course_type,
+            "enrichment": self.enrichment.to_dict(),
+        }
+        if self.original_price is not None or self.original_currency is not None:
+            data["original_price"] = self.original_price
+            data["original_currency"] = self.original_currency
+        return data
+
+    def copy(self):
+        """
+        Shallow copy; the enrichment is shared (it is never modified).
+        """
+        dish = Dish.__new__(Dish)
+        for name in Dish.__slots__:
+            setattr(dish, name, getattr(self, name))
+        return dish
+
+    @property
+    def display_name(self):
+        return self.translated_name or self.dish_name
+
+    def __repr__(self):
+        return f"Dish({self.dish_name!r}, price={self.price!r}, currency={self.currency!r})"
+
+
+def parse_menu(items):
+    """
+    Parsed model JSON -> list of Dish. Malformed entries are dropped here so
+    nothing downstream has to re-check them. Raises ValueError if the
+    response is not a list at all.
+    """
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        raise ValueError(f"menu must be a list, got {type(items).__name__}")
+
+    dishes = []
+    for item in items:
+        try:
+            dishes.append(Dish.from_dict(item))
+        except ValueError:
+            continue
+    return dishes
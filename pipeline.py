@@ -0,0 +1,230 @@
+import io
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cache import content_key
+from chunking import normalize_name, split_menu_text
+from currency import project_dish
+from metrics import get_metrics
+from processor import get_menu_store, is_error_menu
+
+_CHUNK_DONE = object()
+_MORE_CHUNKS = object()
+
+
+class MenuPipeline:
+    """
+    Runs OCR and Gemini structuring for several menu pages concurrently.
+
+    OCR runs in one worker pool and structuring calls in another, so a page's
+    Gemini request starts as soon as its OCR finishes while other pages are
+    still being read. Results come back in page order. Long pages are split
+    into section-sized chunks that are structured in parallel and merged.
+
+    OCR uses threads rather than processes: EasyOCR/torch release the GIL
+    during inference, and threads can share the warm readers in the model
+    pool. Real OCR parallelism is bounded by the pool's readers per language
+    set, so `ocr_workers` defaults to that; more threads would only queue
+    for a reader.
+    """
+
+    def __init__(self, processor, ocr_workers=None, llm_workers=4, max_chunk_tokens=1200, retries=2,
+                 store=None):
+        self.processor = processor
+        if ocr_workers is None:
+            ocr_workers = processor.pool.max_readers_per_key
+        self.ocr_workers = max(1, ocr_workers)
+        self.llm_workers = max(1, llm_workers)
+        self.max_chunk_tokens = max_chunk_tokens
+        self.retries = retries
+        # Digitized menus are kept by image hash; pass store=False to always re-run
+        self.store = get_menu_store() if store is None else store
+
+    def _stored_menu(self, data):
+        """
+        (image_hash, stored dishes or None) for one page's bytes.
+        """
+        if not self.store:
+            return None, None
+        image_hash = content_key(data)
+        menu = self.store.get_menu(image_hash, self.processor.menu_version())
+        get_metrics().count("store_lookups", result="miss" if menu is None else "hit")
+        return image_hash, menu
+
+    def _save_menu(self, image_hash, menu, restaurant):
+        if self.store and image_hash is not None:
+            self.store.save_menu(image_hash, menu, restaurant, self.processor.menu_version())
+
+    def _structure_page(self, raw_text, image_hash, restaurant, target_language, target_currency):
+        menu, failed_chunks = self.processor.structure_menu_chunked(
+            raw_text,
+            max_tokens=self.max_chunk_tokens,
+            workers=self.llm_workers,
+            retries=self.retries
+        )
+        if is_error_menu(menu):
+            return menu
+        get_metrics().observe("dishes_per_page", len(menu))
+        # A page missing chunks is still returned, but not stored: the next
+        # upload of the same image gets another try (as in stream())
+        if not failed_chunks:
+            self._save_menu(image_hash, menu, restaurant)
+        if target_language or target_currency:
+            menu = self.processor.localize_menu(menu, target_language, target_currency)
+        return menu
+
+    def run(self, files, target_language=None, target_currency=None, restaurant=None):
+        """
+        Returns one structured menu (list of dishes or error list) per file,
+        in the same order as `files`, localized to the given language and
+        currency when those are set. Pages already in the menu store skip
+        OCR and Gemini; new pages are stored under `restaurant` once every
+        chunk of them was structured.
+        """
+        if not files:
+            return []
+
+        results = [None] * len(files)
+
+        with ThreadPoolExecutor(self.ocr_workers, thread_name_prefix="menu-ocr") as ocr_pool, \
+                ThreadPoolExecutor(self.llm_workers, thread_name_prefix="menu-llm") as llm_pool:
+
+            ocr_futures = {}
+            for idx, file in enumerate(files):
+                data = file.read()
+                image_hash, stored = self._stored_menu(data)
+                if stored is not None:
+                    results[idx] = (
+                        self.processor.localize_menu(stored, target_language, target_currency)
+                        if target_language or target_currency else stored
+                    )
+                    continue
+                future = ocr_pool.submit(self.processor.extract_text_from_image, io.BytesIO(data))
+                ocr_futures[future] = (idx, image_hash)
+
+            llm_futures = {}
+            for future in as_completed(ocr_futures):
+                idx, image_hash = ocr_futures[future]
+                try:
+                    raw_text = future.result()
+                except Exception as e:
+                    results[idx] = [{"error": f"OCR failed: {str(e)}"}]
+                    continue
+
+                llm_future = llm_pool.submit(
+                    self._structure_page,
+                    raw_text,
+                    image_hash,
+                    restaurant,
+                    target_language,
+                    target_currency
+                )
+                llm_futures[llm_future] = idx
+
+            for future in as_completed(llm_futures):
+                results[llm_futures[future]] = future.result()
+
+        return results
+
+    def stream(self, files, target_currency=None, restaurant=None):
+        """
+        Yields (page_index, Dish) pairs as soon as each dish is generated,
+        across all pages at once. Dishes of one page arrive in menu order;
+        pages interleave. Failures are yielded as {"error": ...} dicts; a
+        chunk that kept some of its dishes (e.g. a truncated response) ends
+        with a {"partial": ...} dict instead.
+
+        Dishes are canonical (original names); prices are projected into
+        `target_currency` on the fly. Call processor.localize_menu on the
+        collected menu to add translated names. Stored pages are replayed
+        from the menu store; new pages are stored only once every chunk has
+        finished cleanly (no error or partial dict).
+        """
+        if not files:
+            return
+
+        events = queue.Queue()
+        page_hashes = [None] * len(files)
+
+        with ThreadPoolExecutor(self.ocr_workers, thread_name_prefix="menu-ocr") as ocr_pool, \
+                ThreadPoolExecutor(self.llm_workers, thread_name_prefix="menu-llm") as llm_pool:
+
+            def structure(idx, chunk):
+                try:
+                    salvaged = False
+                    for _ in range(self.retries + 1):
+                        error = None
+                        # Dishes re-sent by a retried chunk are dropped as duplicates
+                        for dish in self.processor.stream_menu_data(chunk):
+                            if isinstance(dish, dict):
+                                error = dish
+                                break
+                            salvaged = True
+                            events.put((idx, dish))
+                        if error is None:
+                            break
+                    else:
+                        # Dishes already sent stay; the chunk is reported partial
+                        if salvaged and "error" in error:
+                            error = {"partial": error["error"]}
+                        events.put((idx, error))
+                except Exception as e:
+                    events.put((idx, {"error": f"AI Parsing failed: {str(e)}"}))
+                finally:
+                    events.put((idx, _CHUNK_DONE))
+
+            def read(idx, file):
+                try:
+                    data = file.read()
+                    image_hash, stored = self._stored_menu(data)
+                    if stored is not None:
+                        for dish in stored:
+                            events.put((idx, dish))
+                        events.put((idx, _CHUNK_DONE))
+                        return
+                    raw_text = self.processor.extract_text_from_image(io.BytesIO(data))
+                except Exception as e:
+                    events.put((idx, {"error": f"OCR failed: {str(e)}"}))
+                    events.put((idx, _CHUNK_DONE))
+                    return
+
+                page_hashes[idx] = image_hash
+                chunks = split_menu_text(raw_text, max_tokens=self.max_chunk_tokens) or [raw_text]
+                # The page counted as one unit of work; account for the extra chunks
+                events.put((idx, (_MORE_CHUNKS, len(chunks) - 1)))
+                for chunk in chunks:
+                    llm_pool.submit(structure, idx, chunk)
+
+            for idx, file in enumerate(files):
+                ocr_pool.submit(read, idx, file)
+
+            seen = [set() for _ in files]
+            page_menus = [[] for _ in files]
+            page_pending = [1] * len(files)
+            failed = [False] * len(files)
+            pending = len(files)
+            while pending:
+                idx, dish = events.get()
+                if dish is _CHUNK_DONE:
+                    pending -= 1
+                    page_pending[idx] -= 1
+                    if not page_pending[idx]:
+                        get_metrics().observe("dishes_per_page", len(page_menus[idx]))
+                    if not page_pending[idx] and not failed[idx]:
+                        # Only complete, error-free pages are worth keeping
+                        self._save_menu(page_hashes[idx], page_menus[idx], restaurant)
+                elif isinstance(dish, tuple) and dish[0] is _MORE_CHUNKS:
+                    pending += dish[1]
+                    page_pending[idx] += dish[1]
+                elif isinstance(dish, dict):
+                    failed[idx] = True
+                    yield idx, dish
+                else:
+                    key = normalize_name(dish.dish_name)
+                    if key and key in seen[idx]:
+                        continue
+                    seen[idx].add(key)
+                    page_menus[idx].append(dish)
+                    if target_currency:
+                        dish = project_dish(dish, target_currency, self.processor.rates)
+                    yield idx, dish
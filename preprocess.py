@@ -0,0 +1,260 @@
+import argparse
+import os
+import re
+import time
+from collections import Counter
+
+import cv2
+
+
+class PreprocessSettings:
+    """
+    Tunable parameters for the image clean-up done before OCR.
+
+    max_pixels   -- downscale images above this pixel count (0 disables)
+    grayscale    -- convert to single-channel before detection
+    deskew       -- rotate by the estimated text skew
+    max_skew     -- ignore skew estimates larger than this (degrees)
+    crop         -- crop to the bounding box of detected text
+    crop_margin  -- margin kept around the text box, as a fraction of size
+    """
+
+    def __init__(self, max_pixels=2_000_000, grayscale=True, deskew=True,
+                 max_skew=15.0, crop=True, crop_margin=0.02):
+        self.max_pixels = max_pixels
+        self.grayscale = grayscale
+        self.deskew = deskew
+        self.max_skew = max_skew
+        self.crop = crop
+        self.crop_margin = crop_margin
+
+    def as_dict(self):
+        return {
+            "max_pixels": self.max_pixels,
+            "grayscale": self.grayscale,
+            "deskew": self.deskew,
+            "max_skew": self.max_skew,
+            "crop": self.crop,
+            "crop_margin": self.crop_margin,
+        }
+
+
+def preprocess_image(image, settings=None):
+    """
+    OpenCV image -> smaller, upright, text-only image for OCR.
+    """
+    settings = settings or PreprocessSettings()
+
+    image = cap_pixels(image, settings.max_pixels)
+
+    if settings.grayscale and image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    if settings.deskew or settings.crop:
+        mask = _text_mask(image)
+
+        if settings.deskew:
+            angle = estimate_skew(mask)
+            if 0.5 <= abs(angle) <= settings.max_skew:
+                image = _rotate(image, angle)
+                mask = _rotate(mask, angle, fill=0)
+
+        if settings.crop:
+            image = _crop_to_text(image, mask, settings.crop_margin)
+
+    return image
+
+
+def cap_pixels(image, max_pixels):
+    h, w = image.shape[:2]
+    if not max_pixels or h * w <= max_pixels:
+        return image
+
+    scale = (max_pixels / float(h * w)) ** 0.5
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def _text_mask(image):
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    # Text is dark-on-light on most menus; Otsu picks the split per image
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    # Light-on-dark menus: keep the minority as "ink"
+    if cv2.countNonZero(mask) > mask.size // 2:
+        mask = cv2.bitwise_not(mask)
+    return mask
+
+
+def estimate_skew(mask):
+    """
+    Skew angle in degrees (positive = counter-clockwise) from text pixels.
+    """
+    # Merge characters into line blobs so the box follows text lines
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3))
+    lines = cv2.dilate(mask, kernel)
+    points = cv2.findNonZero(lines)
+    if points is None or len(points) < 50:
+        return 0.0
+
+    angle = cv2.minAreaRect(points)[-1]
+    # OpenCV reports (0, 90] or [-90, 0) depending on version; fold into (-45, 45]
+    if angle > 45:
+        angle -= 90
+    elif angle <= -45:
+        angle += 90
+    return -angle
+
+
+def _rotate(image, angle, fill=None):
+    h, w = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), -angle, 1.0)
+    if fill is None:
+        # Replicate edges so rotation does not add dark "text" borders
+        return cv2.warpAffine(image, matrix, (w, h), flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_REPLICATE)
+    return cv2.warpAffine(image, matrix, (w, h), flags=cv2.INTER_NEAREST,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=fill)
+
+
+def _crop_to_text(image, mask, margin):
+    points = cv2.findNonZero(mask)
+    if points is None:
+        return image
+
+    x, y, w, h = cv2.boundingRect(points)
+    img_h, img_w = image.shape[:2]
+    pad_x = int(img_w * margin)
+    pad_y = int(img_h * margin)
+
+    x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+    x1, y1 = min(img_w, x + w + pad_x), min(img_h, y + h + pad_y)
+    return image[y0:y1, x0:x1]
+
+
+# ==========================================
+# SPEED / ACCURACY REPORT
+# ==========================================
+
+def _tokens(text):
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def token_recall(expected, actual):
+    """
+    Share of expected words (with multiplicity) found in the OCR output.
+    """
+    expected_tokens = _tokens(expected)
+    total = sum(expected_tokens.values())
+    if not total:
+        return 1.0
+    found = sum((expected_tokens & _tokens(actual)).values())
+    return found / total
+
+
+def evaluate_preprocessing(processor, samples, settings=None, min_accuracy=0.9):
+    """
+    OCR each sample with and without preprocessing and report time saved.
+
+    `samples` is a list of (image_path, expected_text) pairs. When
+    expected_text is None, the unprocessed OCR output is the reference.
+    Accuracy is the mean token recall of the preprocessed output.
+    """
+    settings = settings or PreprocessSettings()
+    pages = []
+
+    for path, expected in samples:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            continue
+
+        start = time.perf_counter()
+        raw_text = processor.ocr_image(image)
+        raw_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        prepared_text = processor.ocr_image(preprocess_image(image, settings))
+        prepared_seconds = time.perf_counter() - start
+
+        reference = expected if expected is not None else raw_text
+        pages.append({
+            "path": path,
+            "raw_seconds": raw_seconds,
+            "preprocessed_seconds": prepared_seconds,
+            "raw_accuracy": token_recall(reference, raw_text),
+            "accuracy": token_recall(reference, prepared_text),
+        })
+
+    raw_total = sum(p["raw_seconds"] for p in pages)
+    prepared_total = sum(p["preprocessed_seconds"] for p in pages)
+    accuracy = sum(p["accuracy"] for p in pages) / len(pages) if pages else 0.0
+
+    return {
+        "settings": settings.as_dict(),
+        "pages": pages,
+        "raw_seconds": raw_total,
+        "preprocessed_seconds": prepared_total,
+        "saved_seconds": raw_total - prepared_total,
+        "saved_ratio": (raw_total - prepared_total) / raw_total if raw_total else 0.0,
+        "accuracy": accuracy,
+        "min_accuracy": min_accuracy,
+        "passed": bool(pages) and accuracy >= min_accuracy,
+    }
+
+
+def _load_samples(directory):
+    """
+    Images in `directory`; a sibling `<name>.txt` holds the expected text.
+    """
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith((".jpg", ".jpeg", ".png")):
+            continue
+        path = os.path.join(directory, name)
+        expected_path = os.path.splitext(path)[0] + ".txt"
+        expected = None
+        if os.path.exists(expected_path):
+            with open(expected_path, encoding="utf-8") as f:
+                expected = f.read()
+        samples.append((path, expected))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure OCR time saved by preprocessing.")
+    parser.add_argument("samples", help="Directory of sample menu images (+ optional .txt ground truth)")
+    parser.add_argument("--max-pixels", type=int, default=2_000_000)
+    parser.add_argument("--no-grayscale", action="store_true")
+    parser.add_argument("--no-deskew", action="store_true")
+    parser.add_argument("--no-crop", action="store_true")
+    parser.add_argument("--min-accuracy", type=float, default=0.9)
+    args = parser.parse_args()
+
+    from processor import MenuProcessor
+
+    settings = PreprocessSettings(
+        max_pixels=args.max_pixels,
+        grayscale=not args.no_grayscale,
+        deskew=not args.no_deskew,
+        crop=not args.no_crop
+    )
+    report = evaluate_preprocessing(
+        MenuProcessor(ocr_cache=False, llm_cache=False),
+        _load_samples(args.samples),
+        settings,
+        min_accuracy=args.min_accuracy
+    )
+
+    for page in report["pages"]:
+        print(
+            f"{page['path']}: {page['raw_seconds']:.2f}s -> {page['preprocessed_seconds']:.2f}s, "
+            f"accuracy {page['accuracy']:.1%}"
+        )
+    print(
+        f"Saved {report['saved_seconds']:.2f}s ({report['saved_ratio']:.0%}) "
+        f"at {report['accuracy']:.1%} accuracy "
+        f"({'PASS' if report['passed'] else 'FAIL'}, min {report['min_accuracy']:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
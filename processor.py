@@ -1,45 +1,264 @@
-import easyocr
-import google.generativeai as genai
 import json
-import cv2
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
+from cache import DiskCache, LRUCache, SingleFlight, TieredCache, content_key
+from currency import get_rate_table, project_dish
+from chunking import CHARS_PER_TOKEN, estimate_tokens, merge_dishes, split_menu_text
+from json_stream import JSONArrayStreamParser
+from layout import layout_text
+from llm_client import get_gemini_client, parse_model_json
+from menu_store import MenuStore
+from metrics import get_metrics, timed
+from model_pool import get_model_pool
+from models import Dish, parse_menu
+
 # --- CONFIGURATION ---
-API_KEY = # PASTE YOUR API KEY HERE
-genai.configure(api_key=API_KEY)
+API_KEY = "YOUR_API_KEY_HERE"  # PASTE YOUR API KEY HERE
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+MENU_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "menus.sqlite3")
+
+# Anything that changes OCR output must be part of the cache key
+OCR_SETTINGS = {"detail": 0}
+
+# Bump when the structuring prompt changes so old responses are not reused
+PROMPT_VERSION = 3
+TRANSLATION_VERSION = 1
+LLM_CACHE_TTL = 7 * 24 * 3600
+
+# Shared by every processor using the same model (stay under the API quota)
+GEMINI_REQUESTS_PER_MINUTE = 60
+GEMINI_BURST = 10
+
+TRUNCATED_MESSAGE = "response ended before the menu was complete"
+
+_caches = {}
+_caches_lock = threading.Lock()
+_llm_inflight = SingleFlight()
+_menu_store = None
+_gemini_configured = False
+_gemini_lock = threading.Lock()
+
+
+def configure_gemini():
+    """
+    Import and configure the Gemini SDK once, on first use rather than at
+    import time (the SDK is slow to import and not needed to render the UI).
+    """
+    global _gemini_configured
+    with _gemini_lock:
+        if not _gemini_configured and not os.environ.get("GEMINI_BASE_URL"):
+            import google.generativeai as genai
+            genai.configure(api_key=API_KEY)
+        _gemini_configured = True
+
+
+def warm_up(languages=("en",), model_name="gemini-2.5-flash"):
+    """
+    Load the heavy parts (OpenCV, EasyOCR weights, the Gemini model) ahead of
+    the first analysis; meant to run in a background thread.
+    """
+    import cv2  # noqa: F401
+    import preprocess  # noqa: F401
+    configure_gemini()
+    pool = get_model_pool()
+    pool.model(model_name)
+    pool.warm_up(languages)
+
+
+def _shared_cache(name, max_entries, max_bytes, ttl=None):
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TieredCache(
+                memory=LRUCache(max_entries=max_entries, ttl=ttl),
+                disk=DiskCache(os.path.join(CACHE_DIR, name), max_bytes=max_bytes, ttl=ttl)
+            )
+            get_metrics().add_collector(lambda cache=_caches[name], name=name: _cache_gauges(name, cache))
+        return _caches[name]
+
+
+def _cache_gauges(name, cache):
+    stats = cache.stats()
+    labels = (("cache", name),)
+    return {
+        ("cache_hit_rate", labels): stats["hit_rate"],
+        ("cache_hits", labels): stats["hits"],
+        ("cache_misses", labels): stats["misses"],
+    }
+
+
+def get_ocr_cache():
+    """
+    Process-wide OCR result cache: in-memory LRU over a size-bounded disk tier.
+    """
+    return _shared_cache("ocr", max_entries=128, max_bytes=32 * 1024 * 1024)
+
+
+def get_llm_cache():
+    """
+    Process-wide cache of parsed Gemini structuring responses.
+    """
+    return _shared_cache("llm", max_entries=256, max_bytes=64 * 1024 * 1024, ttl=LLM_CACHE_TTL)
+
+
+def get_translation_cache():
+    """
+    Process-wide cache of dish-name translations, keyed by name and language.
+    """
+    return _shared_cache("translations", max_entries=4096, max_bytes=16 * 1024 * 1024)
+
+
+def get_menu_store():
+    """
+    Process-wide SQLite store of digitized menus (kept across runs).
+    """
+    global _menu_store
+    with _caches_lock:
+        if _menu_store is None:
+            _menu_store = MenuStore(MENU_DB)
+        return _menu_store
+
+
+def normalize_menu_text(raw_text):
+    """
+    Canonical form of OCR text for cache keys: NFC, collapsed whitespace.
+    """
+    text = unicodedata.normalize("NFC", raw_text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def is_error_menu(menu):
+    return not isinstance(menu, list) or (
+        len(menu) > 0 and isinstance(menu[0], dict) and "error" in menu[0]
+    )
+
 
 class MenuProcessor:
-    def __init__(self):
-        # Initialize EasyOCR (English is usually enough for OCR, AI handles translation)
-        self.reader = easyocr.Reader(['en']) 
+    def __init__(self, languages=("en",), model_name="gemini-2.5-flash", pool=None,
+                 ocr_cache=None, llm_cache=None, preprocess=None, layout=False,
+                 translation_cache=None, rates=None, client=None):
+        # EasyOCR readers and Gemini models come from a process-wide warm pool,
+        # so creating a processor per request no longer reloads model weights.
+        # (English is usually enough for OCR, AI handles translation)
+        self.languages = tuple(languages)
+        self.model_name = model_name
+        # Custom pools bring their own model factory (stubs, other endpoints)
+        self._configure_gemini = pool is None
+        self.pool = pool or get_model_pool()
+        # The Gemini model and client are set up on the first LLM call, so an
+        # OCR-only processor (e.g. in a batch worker) never touches the SDK
+        self._client = client
+        # Pass ocr_cache=False to always run OCR
+        self.ocr_cache = get_ocr_cache() if ocr_cache is None else ocr_cache
+        # Pass llm_cache=False to always call Gemini
+        self.llm_cache = get_llm_cache() if llm_cache is None else llm_cache
+        # Pass translation_cache=False to always re-translate names
+        self.translation_cache = get_translation_cache() if translation_cache is None else translation_cache
+        # Offline exchange rates used to project prices into the user's currency
+        self.rates = rates or get_rate_table()
+        # Downscale / grayscale / deskew / crop before OCR; preprocess=False skips it
+        if preprocess is None:
+            from preprocess import PreprocessSettings
+            preprocess = PreprocessSettings()
+        self.preprocess = preprocess
+        # layout=True keeps box geometry to rebuild rows/columns and pair prices
+        self.layout = layout
+        self.ocr_settings = dict(OCR_SETTINGS, detail=1, layout=True) if layout else OCR_SETTINGS
+
+    @property
+    def model(self):
         # Use the model you confirmed works
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        if self._configure_gemini:
+            configure_gemini()
+        return self.pool.model(self.model_name)
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Rate limit, retries with backoff, deadlines and a circuit breaker
+            self._client = get_gemini_client(
+                self.model_name, self.model,
+                requests_per_minute=GEMINI_REQUESTS_PER_MINUTE, burst=GEMINI_BURST
+            )
+        return self._client
 
     def extract_text_from_image(self, image_bytes):
         """
         Takes raw image bytes -> OpenCV Image -> Raw Text
+
+        Results are cached by a hash of the image bytes, reader languages and
+        OCR settings, so repeat uploads skip decode and OCR entirely.
         """
-        file_bytes = np.asarray(bytearray(image_bytes.read()), dtype=np.uint8)
-        image = cv2.imdecode(file_bytes, 1)
-        
-        # detail=0 returns just the text list
-        result = self.reader.readtext(image, detail=0)
+        data = image_bytes.read()
+
+        key = None
+        if self.ocr_cache:
+            key = content_key(
+                data, self.languages, self.ocr_settings,
+                self.preprocess.as_dict() if self.preprocess else None
+            )
+            cached = self.ocr_cache.get(key)
+            if cached is not None:
+                return cached["text"]
+
+        # OpenCV is loaded with the first image, not with the app
+        import cv2
+        from preprocess import preprocess_image
+
+        metrics = get_metrics()
+        with metrics.span("decode"):
+            file_bytes = np.frombuffer(data, dtype=np.uint8)
+            image = cv2.imdecode(file_bytes, 1)
+        if image is None:
+            # Not an image (or an unsupported format); cv2 returns None
+            raise ValueError("could not decode image")
+        if self.preprocess:
+            with metrics.span("preprocess"):
+                image = preprocess_image(image, self.preprocess)
+
+        text = self.ocr_image(image)
+
+        if key is not None:
+            self.ocr_cache.put(key, {"text": text})
+        return text
+
+    @timed("ocr")
+    def ocr_image(self, image):
+        """
+        OpenCV Image -> Raw Text (no decoding, preprocessing or caching)
+        """
+        # detail=0 returns just the text list; detail=1 adds boxes and confidence
+        with self.pool.reader(self.languages) as reader:
+            result = reader.readtext(image, detail=self.ocr_settings["detail"])
+
+        if self.layout:
+            return layout_text(result)
         return " ".join(result)
 
-    def structure_menu_data(self, raw_text, target_language="English", target_currency="INR"):
+    @timed("prompt")
+    def build_prompt(self, raw_text):
         """
-        Uses Gemini to structure, translate, and enrich the menu data.
+        Structuring prompt for one page of OCR text.
+
+        The result is canonical: original names, printed prices and the
+        menu's own currency. Translation and currency conversion happen
+        afterwards in localize_menu, so they never need a new structuring call.
         """
-        
         # The prompt to handle the User's specific requirements
         prompt = f"""
         You are an AI Menu Digitizer. 
         I will give you raw text from a restaurant menu. 
+        Lines may already be pre-paired as "Dish name | price".
         
         Your tasks:
         1. Parse dish names, prices, and descriptions.
-        2. TRANSLATE the 'translated_name' to {target_language}.
-        3. CONVERT the price roughly to {target_currency} (assume current rates).
+        2. Keep the dish name exactly as written on the menu (do NOT translate it).
+        3. Keep the price exactly as printed and give the menu's currency as an ISO 4217 code (e.g. INR, EUR, JPY).
         4. CLASSIFY the dish type: 'Starter', 'Main Course', 'Dessert', or 'Beverage'.
         5. ENRICH data: Guess cuisine, regional cuisine (sub-region), spice level, is_veg, calories, possible food allergens, and main ingredients(2-5 commonly known ingredients).
            Allergens can include: Milk, Eggs, Nuts, Peanuts, Soy, Wheat/Gluten, Fish, Shellfish, Prawn.
@@ -54,9 +273,8 @@ class MenuProcessor:
                 "dish_name": "Original Name on Menu",
                 "language_original": "Original language of the menu (e.g. Italian)",
                 "price": 120,
-                "currency": "{target_currency}",
-                "description": "Short description",
-                "translated_name": "Name in {target_language}",
+                "currency": "INR",
+                "description": "Short description in English",
                 "course_type": "Main Course",
                 "enrichment": {{
                     "cuisine": "Italian/Indian/etc",
@@ -70,12 +288,268 @@ class MenuProcessor:
             }}
         ]
         """
-        
+        return prompt
+
+    def menu_version(self):
+        """
+        Everything besides the image that shapes the structured menu; stored
+        menus are only reused under the same version.
+        """
+        return content_key(
+            b"", self.languages, self.ocr_settings,
+            self.preprocess.as_dict() if self.preprocess else None,
+            self.model_name, PROMPT_VERSION
+        )
+
+    def _llm_cache_key(self, raw_text):
+        return content_key(
+            normalize_menu_text(raw_text).encode("utf-8"),
+            self.model_name, PROMPT_VERSION
+        )
+
+    def structure_menu_data(self, raw_text, target_language=None, target_currency=None):
+        """
+        Uses Gemini to structure and enrich the menu data.
+
+        The canonical menu is cached by normalized text and model, and
+        identical concurrent requests share one Gemini call. When a target
+        language or currency is given, the cached menu is localized locally
+        (see localize_menu) instead of re-running the structuring prompt.
+
+        A menu salvaged from a truncated response may be missing dishes;
+        structure_menu_chunked reports (and retries) those.
+        """
+        menu, _ = self._canonical_menu(raw_text)
+        if is_error_menu(menu) or not (target_language or target_currency):
+            return menu
+        return self.localize_menu(menu, target_language, target_currency)
+
+    def _canonical_menu(self, raw_text):
+        """
+        (canonical menu, complete). A menu salvaged from a truncated response
+        is returned with complete=False and never cached.
+        """
+        prompt = self.build_prompt(raw_text)
+
+        if not self.llm_cache:
+            try:
+                value, complete = self._generate_json(prompt)
+                return parse_menu(value), complete
+            except Exception as e:
+                # Fallback if AI fails
+                return [{"error": f"AI Parsing failed: {str(e)}"}], False
+
+        key = self._llm_cache_key(raw_text)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            return parse_menu(cached), True
+
+        def generate():
+            value, complete = self._generate_json(prompt)
+            menu = parse_menu(value)
+            # Only complete, successful parses are cached (already validated);
+            # failures and truncated responses are retried next time
+            if complete:
+                self.llm_cache.put(key, [dish.to_dict() for dish in menu])
+            return menu, complete
+
         try:
-            response = self.model.generate_content(prompt)
-            # Cleaning logic to ensure JSON is valid
-            clean_json = response.text.replace("```json", "").replace("```", "").strip()
-            return json.loads(clean_json)
+            # Coalesced callers share one result; each gets its own Dish objects
+            menu, complete = _llm_inflight.do(key, generate)
+            return [dish.copy() for dish in menu], complete
         except Exception as e:
             # Fallback if AI fails
-            return [{"error": f"AI Parsing failed: {str(e)}"}]
+            return [{"error": f"AI Parsing failed: {str(e)}"}], False
+
+    def localize_menu(self, menu, target_language=None, target_currency=None):
+        """
+        Canonical menu -> menu for the user: prices converted locally with the
+        offline rate table, `translated_name` filled from the name-only
+        translation cache (one Gemini call for any names not cached yet).
+        """
+        if is_error_menu(menu):
+            return menu
+
+        names = [
+            dish.dish_name for dish in menu
+            if dish.language_original.lower() != str(target_language).lower()
+        ]
+        translations = self.translate_names(names, target_language) if target_language and names else {}
+
+        localized = []
+        for dish in menu:
+            dish = project_dish(dish, target_currency, self.rates) if target_currency else dish.copy()
+            dish.translated_name = translations.get(dish.dish_name) or dish.translated_name or dish.dish_name
+            localized.append(dish)
+        return localized
+
+    def translate_names(self, names, target_language):
+        """
+        {name: translated name}. Translations are cached per name and
+        language; names that fail to translate map to themselves.
+        """
+        result = {}
+        missing = []
+
+        for name in dict.fromkeys(names):
+            key = content_key(
+                normalize_menu_text(name).encode("utf-8"),
+                target_language, self.model_name, TRANSLATION_VERSION
+            )
+            cached = self.translation_cache.get(key) if self.translation_cache else None
+            if cached is not None:
+                result[name] = cached["name"]
+            else:
+                missing.append((name, key))
+
+        if missing:
+            prompt = f"""
+        Translate these restaurant dish names to {target_language}.
+        Keep well-known dish names recognisable (transliterate if there is no common translation).
+        Return ONLY a JSON array of strings, in the same order:
+        {json.dumps([name for name, _ in missing], ensure_ascii=False)}
+        """
+            try:
+                translated, _ = self._generate_json(prompt)
+            except Exception:
+                translated = []
+            if not isinstance(translated, list):
+                translated = []
+
+            for (name, key), text in zip(missing, translated):
+                if isinstance(text, str) and text.strip():
+                    result[name] = text.strip()
+                    if self.translation_cache:
+                        self.translation_cache.put(key, {"name": result[name]})
+
+        for name in names:
+            result.setdefault(name, name)
+        return result
+
+    def structure_menu_chunked(self, raw_text, target_language=None, target_currency=None,
+                               max_tokens=1200, workers=4, retries=2):
+        """
+        Structure long menus section by section: the text is split into
+        heading-aligned chunks that are sent to Gemini concurrently, then
+        merged with duplicate dishes removed.
+
+        Returns (menu, failed_chunks). A failed or truncated chunk is retried
+        on its own (finished chunks are cached). If it keeps failing it is
+        dropped; if it keeps coming back truncated its salvaged dishes are
+        kept. `failed_chunks` counts both, so callers can tell a partial page
+        from a complete one. If every chunk fails the usual
+        [{"error": ...}] fallback is returned.
+        """
+        def structure_chunk(chunk):
+            for _ in range(retries + 1):
+                menu, complete = self._canonical_menu(chunk)
+                if complete:
+                    break
+            return menu, complete
+
+        chunks = split_menu_text(raw_text, max_tokens=max_tokens)
+        if len(chunks) <= 1:
+            results = [structure_chunk(raw_text)]
+        else:
+            with ThreadPoolExecutor(min(workers, len(chunks)), thread_name_prefix="menu-chunk") as pool:
+                results = list(pool.map(structure_chunk, chunks))
+
+        good = [menu for menu, _ in results if not is_error_menu(menu)]
+        if not good:
+            return results[0][0], len(results)
+
+        menu = merge_dishes(good) if len(results) > 1 else good[0]
+        if target_language or target_currency:
+            # One translation batch for the whole page, not one per chunk
+            menu = self.localize_menu(menu, target_language, target_currency)
+        return menu, sum(1 for _, complete in results if not complete)
+
+    def stream_menu_data(self, raw_text):
+        """
+        Streaming version of structure_menu_data: yields each canonical Dish
+        as soon as Gemini has finished generating it (malformed ones are
+        skipped).
+
+        A cached response is replayed immediately, and a request identical to
+        one already in flight (streamed or not) waits for and replays its
+        menu. On failure an {"error": ...} dict is yielded and nothing is
+        cached. A response cut off part-way keeps the dishes already yielded
+        and ends with a {"partial": ...} dict instead; it is not cached
+        either.
+        """
+        key = None
+        if self.llm_cache:
+            key = self._llm_cache_key(raw_text)
+            cached = self.llm_cache.get(key)
+            if cached is not None:
+                yield from parse_menu(cached)
+                return
+
+            call, leader = _llm_inflight.begin(key)
+            if not leader:
+                call.done.wait()
+                if call.error is not None:
+                    yield {"error": f"AI Parsing failed: {str(call.error)}"}
+                    return
+                menu, complete = call.result
+                yield from (dish.copy() for dish in menu)
+                if not complete:
+                    yield {"partial": TRUNCATED_MESSAGE}
+                return
+
+        prompt = self.build_prompt(raw_text)
+        parser = JSONArrayStreamParser()
+        menu = []
+        # What waiting callers get if this stream is abandoned part-way
+        result, error = None, RuntimeError("response stream was abandoned")
+
+        metrics = get_metrics()
+        metrics.count("llm_tokens", estimate_tokens(prompt), kind="prompt")
+        response_chars = 0
+
+        try:
+            try:
+                with metrics.span("llm", mode="stream"):
+                    for text in self.client.stream(prompt):
+                        response_chars += len(text)
+                        for item in parser.feed(text):
+                            try:
+                                dish = Dish.from_dict(item)
+                            except ValueError:
+                                continue
+                            menu.append(dish)
+                            yield dish.copy()
+            except Exception as e:
+                # Fallback if AI fails; dishes already yielded stay valid
+                error = e
+                yield {"error": f"AI Parsing failed: {str(e)}"}
+                return
+
+            metrics.count("llm_tokens", response_chars // CHARS_PER_TOKEN, kind="response")
+            if not parser.finished:
+                if not menu:
+                    error = ValueError(TRUNCATED_MESSAGE)
+                    yield {"error": f"AI Parsing failed: {str(error)}"}
+                    return
+                # Keep what was parsed: the page is partial, not failed
+                result, error = (menu, False), None
+                yield {"partial": TRUNCATED_MESSAGE}
+                return
+
+            result, error = (menu, True), None
+            if key is not None:
+                self.llm_cache.put(key, [dish.to_dict() for dish in menu])
+        finally:
+            if key is not None:
+                _llm_inflight.finish(key, call, result, error)
+
+    def _generate_json(self, prompt):
+        metrics = get_metrics()
+        metrics.count("llm_tokens", estimate_tokens(prompt), kind="prompt")
+        with metrics.span("llm"):
+            text = self.client.generate(prompt)
+        metrics.count("llm_tokens", estimate_tokens(text), kind="response")
+        # Fenced, trailing-comma or truncated JSON is repaired rather than
+        # discarded; (value, complete) so truncation can be told apart
+        with metrics.span("parse"):
+            return parse_model_json(text)
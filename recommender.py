@@ -1,3 +1,15 @@
+import heapq
+
+import numpy as np
+
+from currency import project_dish
+from meal_optimizer import optimize_meal
+from scoring import COURSE_CODES, MIN_SCORE, MenuArrays, best_index, explain, score_menu
+
+# Courses a full meal may go without (a drink is nice, not required)
+OPTIONAL_MEAL_COURSES = ("Beverage",)
+
+
 class DishRecommender:
 
     def recommend(self, menu_data, preferences):
@@ -7,179 +19,159 @@ class DishRecommender:
         2. Budget
         3. Spice Tolerance
         4. Course Preference (Starter/Main/Dessert)
+
+        All dishes are scored in one vectorized pass (see scoring.py).
+        `menu_data` may be a list of dishes or a prebuilt MenuArrays, which
+        lets callers re-score the same menu without rebuilding the arrays.
         """
-        best_dish = None
-        best_score = -100
-        explanation = ""
+        arrays = menu_data if isinstance(menu_data, MenuArrays) else None
+        dishes = arrays.dishes if arrays is not None else menu_data
 
         # Basic error check
-        if not menu_data or "error" in menu_data[0]:
+        if not dishes or (isinstance(dishes[0], dict) and "error" in dishes[0]):
             return None, "Error in menu data processing."
 
-        for dish in menu_data:
-
-            dish.setdefault("language_original", "Unknown")
-            score = 0
-            reasons = []
-
-            price = dish.get('price')
-            price = float(price) if isinstance(price, (int, float, str)) and str(price).strip() != "" else 0
-
-            course_type = dish.get('course_type', 'Main Course')
-
-            enrichment = dish.get('enrichment', {})
-
-            
-            is_veg = enrichment.get('is_veg', False)
-            spice_level = enrichment.get('spice_level', 'Medium')
-
-            # Health-based preference (soft scoring)
-            health_goal = preferences.get("health_goal", "No Preference")
-            calories = enrichment.get("calories_approx", 0)
-            ingredients = enrichment.get("ingredients", [])
-
-            if health_goal == "Low Calorie 🥗":
-                if isinstance(calories, (int, float)) and calories <= 350:
-                    score += 15
-                    reasons.append("Low in calories.")
-                else:
-                    score -= 5
-
-            elif health_goal == "High Protein 💪":
-                protein_keywords = ["chicken", "egg", "paneer", "tofu", "fish", "lentil", "dal"]
-                if any(p in " ".join(ingredients).lower() for p in protein_keywords):
-                    score += 15
-                    reasons.append("High protein content.")
-
-            elif health_goal == "Light & Easy to Digest 🧘":
-                if spice_level == "Low":
-                    score += 10
-                    reasons.append("Light and easy to digest.")
-                if isinstance(calories, (int, float)) and calories <= 400:
-                    score += 5
-
-            elif health_goal == "Low Spice 🌶️":
-                if spice_level == "Low":
-                    score += 15
-                    reasons.append("Low spice as preferred.")
-                elif spice_level == "High":
-                    score -= 15
-
-
-            dish_cuisine = enrichment.get("cuisine", "").lower()
-            preferred_cuisines = [c.lower() for c in preferences.get("preferred_cuisines", [])]
-
-            if preferred_cuisines:
-                if any(cuisine in dish_cuisine for cuisine in preferred_cuisines):
-                    score += 15
-                    reasons.append("Matches your preferred cuisine.")
-                else:
-                    score -= 5
-
-            eating_style = preferences.get("eating_style", "Balanced ⚖️ (Both)")
-
-            if eating_style.startswith("Familiar"):
-                if any(cuisine in dish_cuisine for cuisine in preferred_cuisines):
-                    score += 10
-                    reasons.append("Familiar taste for you.")
-                else:
-                    score -= 10
-
-            elif eating_style.startswith("Experimental"):
-                if not any(cuisine in dish_cuisine for cuisine in preferred_cuisines):
-                    score += 10
-                    reasons.append("Something new to explore!")
-
+        if arrays is None:
+            arrays = MenuArrays(dishes)
 
+        score, eligible, flags = score_menu(arrays, preferences)
+        idx = best_index(score, eligible)
+        if idx is None:
+            return None, ""
 
-            user_diet = preferences['dietary_type']
+        return arrays.dishes[idx], explain(arrays, idx, flags, preferences)
 
-            if "Vegetarian Only" in user_diet and not is_veg:
-                continue
-            if "Non-Vegetarian Only" in user_diet and is_veg:
-                continue
-
-            user_budget = preferences['budget']
-            if price <= user_budget:
-                score += 10
-                reasons.append("Fits your budget.")
-            else:
-                score -= 20
-
-            user_course = preferences['course_preference']
-
-            if "Full Meal" in user_course:
-                score += 5
-            elif "Main Course" in user_course and course_type == "Main Course":
-                score += 15
-                reasons.append("It is a Main Course.")
-            elif "Starter" in user_course and course_type == "Starter":
-                score += 15
-                reasons.append("It is a Starter.")
-            elif "Dessert" in user_course and course_type == "Dessert":
-                score += 15
-                reasons.append("It is a Dessert.")
-            elif user_course != "Surprise Me (Any)":
-                score -= 10
-
-            user_spice = preferences['spice_tolerance']
-            if user_spice == spice_level:
-                score += 5
-                reasons.append(f"Perfect {user_spice} spice.")
-            elif user_spice == "Low" and spice_level == "High":
-                score -= 50
-
-            if score > best_score:
-                best_score = score
-                best_dish = dish
-
-                explanation = reasons.copy() if reasons else ["Matches your overall preferences."]
-
-                region = enrichment.get("region")
-                if region:
-                    explanation.append(f"Belongs to the {region} cuisine.")
-
-                if "Vegetarian" in user_diet:
-                    explanation.append("Follows your vegetarian preference.")
-
-                if preferred_cuisines:
-                    explanation.append("Aligns with cuisines you usually enjoy.")
-
-                if eating_style.startswith("Experimental"):
-                    explanation.append("Encourages you to try something new.")
-
-                ingredients = enrichment.get("ingredients", [])
-                if ingredients:
-                    explanation.append(
-                        f"Key ingredients include {', '.join(ingredients[:3])}."
-                    )
+    def candidates_from_store(self, store, preferences, target_currency=None, rates=None,
+                              courses=None, restaurant=None, image_hashes=None, version=None):
+        """
+        MenuArrays of the stored dishes that can be recommended at all.
 
+        The hard filters (dietary type, and the selected courses unless
+        `courses` is given) run as indexed MenuStore queries, so only
+        candidates are loaded; the soft rules are scored as usual by the
+        recommend* methods. Pass courses=False to keep every course.
 
-        return best_dish, explanation
+        Stored dishes keep their menu's currency; pass the user's
+        `target_currency` (the budget's) to project prices before scoring.
+        """
+        user_diet = preferences['dietary_type']
+        is_veg = None
+        if "Non-Vegetarian Only" in user_diet:
+            is_veg = False
+        elif "Vegetarian Only" in user_diet:
+            is_veg = True
+
+        if courses is None:
+            courses = [c for c in preferences.get("multi_course_selection", []) if c in COURSE_CODES]
+
+        dishes = store.query_dishes(
+            courses=courses or None,
+            is_veg=is_veg,
+            restaurant=restaurant,
+            image_hashes=image_hashes,
+            version=version
+        )
+        if target_currency:
+            dishes = [project_dish(dish, target_currency, rates) for dish in dishes]
+        return MenuArrays(dishes)
 
     # MUST BE INSIDE THE CLASS
-    def recommend_course_wise(self, menu_data, preferences):
+    def recommend_course_wise(self, menu_data, preferences, top_k=3):
         """
-        Recommend the best dish for each selected course
+        Recommend the best dishes for each selected course
         (Starter, Main Course, Dessert, Beverage).
+
+        The menu is scored once and a single pass keeps a bounded heap of the
+        `top_k` dishes per course, so the cost is linear in menu size however
+        many courses are selected. Each course maps to its best "dish",
+        "reason" and "score", plus "runners_up" (the rest of the top k, best
+        first, each with its own dish/reason/score).
         """
-        selected_courses = preferences.get("multi_course_selection", [])
-        results = {}
+        arrays = menu_data if isinstance(menu_data, MenuArrays) else MenuArrays(menu_data)
+
+        wanted = {}
+        for course in preferences.get("multi_course_selection", []):
+            if course in COURSE_CODES:
+                wanted[COURSE_CODES[course]] = course
+        if not wanted or not len(arrays):
+            return {}
+
+        score, eligible, flags = score_menu(arrays, preferences)
+        candidates = eligible & (score > MIN_SCORE) & np.isin(arrays.listed_course, list(wanted))
+
+        heaps = {code: [] for code in wanted}
+        for idx, course, dish_score in zip(
+            np.flatnonzero(candidates).tolist(),
+            arrays.listed_course[candidates].tolist(),
+            score[candidates].tolist()
+        ):
+            heap = heaps[course]
+            # Ties go to the dish listed first, as in recommend()
+            item = (dish_score, -idx)
+            if len(heap) < max(1, top_k):
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
 
-        for course in selected_courses:
-            course_dishes = [
-                dish for dish in menu_data
-                if dish.get("course_type") == course
+        results = {}
+        for code, course in wanted.items():
+            ranked = [
+                {
+                    "dish": arrays.dishes[-neg_idx],
+                    "reason": explain(arrays, -neg_idx, flags, preferences),
+                    "score": dish_score,
+                }
+                for dish_score, neg_idx in sorted(heaps[code], reverse=True)
             ]
+            if ranked:
+                results[course] = dict(ranked[0], runners_up=ranked[1:])
 
-            if not course_dishes:
-                continue
+        return results
 
-            best_dish, reason = self.recommend(course_dishes, preferences)
-            if best_dish:
-                results[course] = {
-                    "dish": best_dish,
-                    "reason": reason
-                }
+    def recommend_full_meal(self, menu_data, preferences, top_n=3):
+        """
+        Best meals with one dish per selected course whose total price stays
+        within the per-person budget, ranked by total score.
 
-        return results
+        A beverage is optional next to other courses: it is added when it
+        fits the budget and improves the meal. Courses with nothing eligible
+        or affordable are left out rather than ruling out every meal.
+
+        Returns up to `top_n` meals, best first. Each meal has "total_score",
+        "total_price" and "courses" (course -> dish/reason/score, in the
+        order the courses were selected).
+        """
+        arrays = menu_data if isinstance(menu_data, MenuArrays) else MenuArrays(menu_data)
+
+        selected = [c for c in preferences.get("multi_course_selection", []) if c in COURSE_CODES]
+        if not selected or not len(arrays):
+            return []
+
+        score, eligible, flags = score_menu(arrays, preferences)
+        candidates = eligible & (score > MIN_SCORE)
+
+        courses = {}
+        for course in selected:
+            positions = np.flatnonzero(candidates & (arrays.listed_course == COURSE_CODES[course]))
+            courses[course] = list(zip(
+                score[positions].tolist(),
+                arrays.price[positions].tolist(),
+                positions.tolist()
+            ))
+
+        optional = OPTIONAL_MEAL_COURSES if len(selected) > 1 else ()
+        meals = []
+        for total_score, total_price, picks in optimize_meal(courses, preferences['budget'], top_n, optional):
+            meals.append({
+                "total_score": total_score,
+                "total_price": total_price,
+                "courses": {
+                    course: {
+                        "dish": arrays.dishes[picks[course]],
+                        "reason": explain(arrays, picks[course], flags, preferences),
+                        "score": int(score[picks[course]]),
+                    }
+                    for course in selected if course in picks
+                },
+            })
+        return meals
@@ -0,0 +1,255 @@
+import numpy as np
+
+from ingredient_index import IngredientIndex
+from metrics import timed
+from models import Dish
+
+SPICE_CODES = {"Low": 0, "Medium": 1, "High": 2}
+COURSE_CODES = {"Starter": 0, "Main Course": 1, "Dessert": 2, "Beverage": 3}
+PROTEIN_KEYWORDS = ["chicken", "egg", "paneer", "tofu", "fish", "lentil", "dal"]
+
+# Best dish must beat this (same starting point as the original loop)
+MIN_SCORE = -100
+
+
+def as_dish(item):
+    """
+    Dish objects pass through; plain dicts from older callers are coerced
+    with the same rules (leniently, so nothing is dropped from scoring).
+    """
+    if isinstance(item, Dish):
+        return item
+    return Dish.from_dict(item, strict=False)
+
+
+class MenuArrays:
+    """
+    Columnar view of a menu for vectorized scoring.
+
+    Built once per menu; every preference-dependent rule is then evaluated
+    over whole arrays. Cuisines are stored as codes into `cuisines` so the
+    substring match against preferred cuisines runs once per distinct
+    cuisine, not once per dish.
+    """
+
+    @timed("arrays")
+    def __init__(self, menu_data):
+        self.dishes = list(menu_data)
+        # Typed view used for scoring and explanations; same objects for Dish input
+        self.items = [as_dish(dish) for dish in self.dishes]
+        n = len(self.dishes)
+
+        self.price = np.zeros(n, dtype=np.float64)
+        self.calories = np.full(n, np.nan, dtype=np.float64)
+        self.spice = np.full(n, -1, dtype=np.int8)
+        self.is_veg = np.zeros(n, dtype=bool)
+        self.course = np.full(n, COURSE_CODES["Main Course"], dtype=np.int8)
+        # Course as listed, without the "Main Course" default used for scoring
+        self.listed_course = np.full(n, -1, dtype=np.int8)
+        self.cuisine_code = np.zeros(n, dtype=np.int32)
+        self.has_protein = np.zeros(n, dtype=bool)
+
+        self.cuisines = []
+        cuisine_index = {}
+        self._ingredient_index = None
+
+        for i, dish in enumerate(self.items):
+            enrichment = dish.enrichment
+
+            if dish.price is not None:
+                self.price[i] = dish.price
+            if enrichment.calories_approx is not None:
+                self.calories[i] = enrichment.calories_approx
+
+            self.spice[i] = SPICE_CODES.get(enrichment.spice_level, -1)
+            self.is_veg[i] = enrichment.is_veg
+            course = COURSE_CODES.get(dish.course_type, -1)
+            self.course[i] = course if dish.course_type is not None else COURSE_CODES["Main Course"]
+            self.listed_course[i] = course
+
+            cuisine = (enrichment.cuisine or "").lower()
+            code = cuisine_index.get(cuisine)
+            if code is None:
+                code = cuisine_index[cuisine] = len(self.cuisines)
+                self.cuisines.append(cuisine)
+            self.cuisine_code[i] = code
+
+            ingredients = " ".join(enrichment.ingredients).lower()
+            self.has_protein[i] = any(p in ingredients for p in PROTEIN_KEYWORDS)
+
+    def __len__(self):
+        return len(self.dishes)
+
+    @property
+    def ingredient_index(self):
+        """
+        Allergen/ingredient inverted index over these dishes, built on first use.
+        """
+        if self._ingredient_index is None:
+            self._ingredient_index = IngredientIndex(self.items)
+        return self._ingredient_index
+
+    def ingredient_mask(self, include=(), exclude=()):
+        """
+        Boolean mask of dishes containing every `include` term and none of
+        the `exclude` terms (allergens and ingredients both count).
+        """
+        index = self.ingredient_index
+        # Only the (usually few) listed ids are touched: "no peanuts" scatters
+        # the peanut dishes into the mask instead of enumerating the rest
+        included = index.all_of(include)
+        if included is None:
+            mask = np.ones(len(self), dtype=bool)
+        else:
+            mask = np.zeros(len(self), dtype=bool)
+            if included:
+                mask[np.fromiter(included, dtype=np.intp, count=len(included))] = True
+        excluded = index.any_of(exclude)
+        if excluded:
+            mask[np.fromiter(excluded, dtype=np.intp, count=len(excluded))] = False
+        return mask
+
+
+@timed("score")
+def score_menu(arrays, preferences):
+    """
+    Scores every dish in one pass. Returns (scores, eligible, flags) where
+    `eligible` drops dishes that break the dietary filter and `flags` holds
+    the per-dish reason masks used to explain a pick.
+    """
+    n = len(arrays)
+    score = np.zeros(n, dtype=np.int64)
+    flags = {}
+
+    low = arrays.spice == SPICE_CODES["Low"]
+    high = arrays.spice == SPICE_CODES["High"]
+    calories = arrays.calories
+    known_calories = ~np.isnan(calories)
+
+    # Health-based preference (soft scoring)
+    health_goal = preferences.get("health_goal", "No Preference")
+
+    if health_goal == "Low Calorie 🥗":
+        hit = known_calories & (np.nan_to_num(calories, nan=np.inf) <= 350)
+        score += np.where(hit, 15, -5)
+        flags["Low in calories."] = hit
+
+    elif health_goal == "High Protein 💪":
+        score += np.where(arrays.has_protein, 15, 0)
+        flags["High protein content."] = arrays.has_protein
+
+    elif health_goal == "Light & Easy to Digest 🧘":
+        score += np.where(low, 10, 0)
+        score += np.where(known_calories & (np.nan_to_num(calories, nan=np.inf) <= 400), 5, 0)
+        flags["Light and easy to digest."] = low
+
+    elif health_goal == "Low Spice 🌶️":
+        score += np.where(low, 15, np.where(high, -15, 0))
+        flags["Low spice as preferred."] = low
+
+    preferred_cuisines = [c.lower() for c in preferences.get("preferred_cuisines", [])]
+    cuisine_hit = np.array(
+        [any(c in cuisine for c in preferred_cuisines) for cuisine in arrays.cuisines],
+        dtype=bool
+    )
+    matches = cuisine_hit[arrays.cuisine_code] if n else np.zeros(0, dtype=bool)
+
+    if preferred_cuisines:
+        score += np.where(matches, 15, -5)
+        flags["Matches your preferred cuisine."] = matches
+
+    eating_style = preferences.get("eating_style", "Balanced ⚖️ (Both)")
+
+    if eating_style.startswith("Familiar"):
+        score += np.where(matches, 10, -10)
+        flags["Familiar taste for you."] = matches
+
+    elif eating_style.startswith("Experimental"):
+        score += np.where(~matches, 10, 0)
+        flags["Something new to explore!"] = ~matches
+
+    user_diet = preferences['dietary_type']
+    eligible = np.ones(n, dtype=bool)
+    if "Vegetarian Only" in user_diet:
+        eligible &= arrays.is_veg
+    if "Non-Vegetarian Only" in user_diet:
+        eligible &= ~arrays.is_veg
+
+    # Hard allergen / ingredient filters, answered by the inverted index
+    avoid = preferences.get("avoid_allergens", [])
+    require = preferences.get("required_ingredients", [])
+    if avoid or require:
+        eligible &= arrays.ingredient_mask(include=require, exclude=avoid)
+
+    fits_budget = arrays.price <= preferences['budget']
+    score += np.where(fits_budget, 10, -20)
+    flags["Fits your budget."] = fits_budget
+
+    user_course = preferences['course_preference']
+
+    if "Full Meal" in user_course:
+        score += 5
+    else:
+        matched = np.zeros(n, dtype=bool)
+        for label in ("Main Course", "Starter", "Dessert"):
+            if label in user_course:
+                is_course = arrays.course == COURSE_CODES[label]
+                score += np.where(is_course, 15, 0)
+                flags[f"It is a {label}."] = is_course
+                matched |= is_course
+        if user_course != "Surprise Me (Any)":
+            score -= np.where(matched, 0, 10)
+
+    user_spice = preferences['spice_tolerance']
+    same_spice = arrays.spice == SPICE_CODES.get(user_spice, -2)
+    score += np.where(same_spice, 5, 0)
+    flags[f"Perfect {user_spice} spice."] = same_spice
+    if user_spice == "Low":
+        score -= np.where(high, 50, 0)
+
+    return score, eligible, flags
+
+
+def best_index(score, eligible):
+    """
+    Position of the first highest-scoring eligible dish above MIN_SCORE, or None.
+    """
+    candidates = eligible & (score > MIN_SCORE)
+    if not candidates.any():
+        return None
+    return int(np.argmax(np.where(candidates, score, np.iinfo(np.int64).min)))
+
+
+def explain(arrays, idx, flags, preferences):
+    """
+    Explanation list for the dish at `idx`, in the same order and wording
+    as the per-dish rules.
+    """
+    enrichment = arrays.items[idx].enrichment
+
+    reasons = [reason for reason, mask in flags.items() if mask[idx]]
+    explanation = reasons if reasons else ["Matches your overall preferences."]
+
+    region = enrichment.region
+    if region:
+        explanation.append(f"Belongs to the {region} cuisine.")
+
+    if "Vegetarian" in preferences['dietary_type']:
+        explanation.append("Follows your vegetarian preference.")
+
+    if preferences.get("avoid_allergens", []):
+        explanation.append(f"Free of {', '.join(preferences['avoid_allergens'])}.")
+
+    if preferences.get("preferred_cuisines", []):
+        explanation.append("Aligns with cuisines you usually enjoy.")
+
+    if preferences.get("eating_style", "Balanced ⚖️ (Both)").startswith("Experimental"):
+        explanation.append("Encourages you to try something new.")
+
+    ingredients = enrichment.ingredients
+    if ingredients:
+        explanation.append(
+            f"Key ingredients include {', '.join(ingredients[:3])}."
+        )
+
+    return explanation
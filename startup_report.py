@@ -0,0 +1,72 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# What app.py imports to render the first page
+APP_MODULES = [
+    "processor", "pipeline", "recommender", "image_index", "thumbnails",
+    "cache", "currency", "scoring",
+]
+
+# What used to load at import time and now waits for the first analysis
+DEFERRED_MODULES = ["cv2", "easyocr", "google.generativeai"]
+
+
+def import_seconds(modules):
+    """
+    Seconds spent importing `modules` in a fresh interpreter (from
+    -X importtime), or None if one of them is not installed.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        return None
+
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level entries only; nested ones are already in their parent's total
+        if not name.startswith("  ") and name.strip() in modules:
+            total_us += int(cumulative)
+    return total_us / 1e6
+
+
+def median_seconds(modules, repeat):
+    samples = [import_seconds(modules) for _ in range(repeat)]
+    if None in samples:
+        return None
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time cost of app startup vs. deferred modules.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    startup = median_seconds(APP_MODULES, args.repeat)
+    if startup is None:
+        sys.exit("App modules failed to import")
+    print(f"Startup imports (app modules): {startup * 1000:8.1f} ms")
+
+    print("Deferred until first analysis:")
+    saved = 0.0
+    for module in DEFERRED_MODULES:
+        seconds = median_seconds([module], args.repeat)
+        if seconds is None:
+            print(f"  {module:<22} not installed")
+            continue
+        saved += seconds
+        print(f"  {module:<22} {seconds * 1000:8.1f} ms")
+
+    print(f"Saved per cold start: {saved * 1000:8.1f} ms "
+          f"({saved / (saved + startup):.0%} of the previous import time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from ingredient_index import IngredientIndex
+from models import Dish, Enrichment
+
+
+def _dish(name, ingredients=(), allergens=()):
+    return Dish(name, enrichment=Enrichment(ingredients=ingredients, allergens=allergens))
+
+
+DISHES = [
+    _dish("Paneer Tikka", ["paneer", "yogurt"]),
+    _dish("Dal Makhani", ["lentils", "butter", "cream"]),
+    _dish("Thai Curry", ["coconut milk", "chicken"]),
+    _dish("Kaju Katli", ["cashews", "sugar"]),
+    _dish("Almond Cake", ["almond milk", "flour"]),
+    _dish("Satay", ["peanut butter", "chicken"]),
+    _dish("Grilled Salmon", ["salmon", "lemon"]),
+    _dish("Tuna Salad", ["tuna", "lettuce"]),
+    _dish("Prawn Fry", ["prawns"]),
+    _dish("Green Salad", ["lettuce", "cucumber"]),
+]
+NAMES = [dish.dish_name for dish in DISHES]
+
+
+def excluded(*terms):
+    ids = IngredientIndex(DISHES).any_of(terms)
+    return sorted(NAMES[i] for i in ids)
+
+
+def test_excluding_milk_removes_dairy_but_not_plant_milks():
+    assert excluded("Milk") == ["Dal Makhani", "Paneer Tikka"]
+
+
+def test_excluding_nuts_removes_tree_nuts():
+    assert excluded("Nuts") == ["Almond Cake", "Kaju Katli"]
+
+
+def test_peanut_butter_is_peanut_not_dairy():
+    assert excluded("Peanuts") == ["Satay"]
+    assert "Satay" not in excluded("Dairy")
+
+
+def test_fish_and_shellfish_families():
+    assert excluded("Fish") == ["Grilled Salmon", "Tuna Salad"]
+    assert excluded("Shellfish") == ["Prawn Fry"]
+
+
+def test_includes_are_not_widened_to_the_family():
+    ids = IngredientIndex(DISHES).all_of(["butter"])
+    assert sorted(NAMES[i] for i in ids) == ["Dal Makhani"]
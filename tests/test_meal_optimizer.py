@@ -0,0 +1,52 @@
+from meal_optimizer import optimize_meal
+from models import Dish, Enrichment
+from recommender import DishRecommender
+
+PREFERENCES = {
+    "budget": 1000,
+    "dietary_type": "Mix (Any) 🥘",
+    "spice_tolerance": "Medium",
+    "course_preference": "Full Meal (Starter + Main + Dessert)",
+    "multi_course_selection": ["Starter", "Main Course", "Dessert", "Beverage"],
+    "preferred_cuisines": [],
+    "eating_style": "Balanced ⚖️ (Both)",
+    "health_goal": "No Preference",
+}
+
+
+def _dish(name, course, price):
+    return Dish(name, price=price, currency="INR", course_type=course,
+                enrichment=Enrichment(cuisine="Indian", spice_level="Medium", is_veg=True))
+
+
+def test_expensive_beverage_does_not_rule_out_the_meal():
+    menu = [
+        _dish("Samosa", "Starter", 300),
+        _dish("Thali", "Main Course", 400),
+        _dish("Kheer", "Dessert", 200),
+        _dish("Wine", "Beverage", 900),
+    ]
+    meals = DishRecommender().recommend_full_meal(menu, PREFERENCES)
+    assert meals
+    assert list(meals[0]["courses"]) == ["Starter", "Main Course", "Dessert"]
+    assert meals[0]["total_price"] == 900
+
+
+def test_affordable_beverage_is_still_added():
+    menu = [
+        _dish("Samosa", "Starter", 300),
+        _dish("Thali", "Main Course", 400),
+        _dish("Kheer", "Dessert", 200),
+        _dish("Lassi", "Beverage", 80),
+    ]
+    meals = DishRecommender().recommend_full_meal(menu, PREFERENCES)
+    assert "Beverage" in meals[0]["courses"]
+
+
+def test_course_with_nothing_affordable_is_skipped():
+    courses = {
+        "Starter": [(10, 300, "a")],
+        "Main Course": [(10, 400, "b")],
+        "Dessert": [(10, 2000, "c")],
+    }
+    assert optimize_meal(courses, 1000) == [(20, 700.0, {"Starter": "a", "Main Course": "b"})]
@@ -0,0 +1,58 @@
+import json
+
+from cache import TieredCache
+from model_pool import ModelPool
+from processor import MenuProcessor
+
+DISHES = [
+    {"dish_name": "Paneer Tikka", "price": 250, "currency": "INR", "course_type": "Starter"},
+    {"dish_name": "Butter Chicken", "price": 420, "currency": "INR", "course_type": "Main Course"},
+]
+FULL = json.dumps(DISHES)
+# Cut off inside the second dish
+TRUNCATED = FULL[:FULL.index("Butter") + 3]
+
+
+class ScriptedClient:
+    """
+    Returns the scripted responses in order, then repeats the last one.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def generate(self, prompt):
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+    def stream(self, prompt):
+        yield self.generate(prompt)
+
+
+def _processor(client):
+    pool = ModelPool(model_factory=lambda name: None)
+    return MenuProcessor(pool=pool, ocr_cache=False, llm_cache=TieredCache(),
+                         translation_cache=False, preprocess=False, client=client)
+
+
+def test_truncated_response_is_partial_and_not_cached():
+    processor = _processor(ScriptedClient(TRUNCATED))
+    menu, failed_chunks = processor.structure_menu_chunked("Paneer Tikka 250", retries=1)
+    assert [dish.dish_name for dish in menu] == ["Paneer Tikka"]
+    assert failed_chunks == 1
+    assert len(processor.llm_cache.memory) == 0
+
+
+def test_truncated_chunk_is_retried():
+    processor = _processor(ScriptedClient(TRUNCATED, FULL))
+    menu, failed_chunks = processor.structure_menu_chunked("Paneer Tikka 250", retries=1)
+    assert len(menu) == 2
+    assert failed_chunks == 0
+    assert len(processor.llm_cache.memory) == 1
+
+
+def test_truncated_stream_keeps_dishes():
+    processor = _processor(ScriptedClient(TRUNCATED))
+    events = list(processor.stream_menu_data("Paneer Tikka 250"))
+    assert events[0].dish_name == "Paneer Tikka"
+    assert "partial" in events[-1]
+    assert len(processor.llm_cache.memory) == 0
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import threading
+
+from PIL import Image, ImageOps
+
+
+class ThumbnailCache:
+    """
+    Display-size JPEG derivatives of dish images, stored on disk.
+
+    Each source is decoded once (AVIF included) and re-rendered only when
+    its mtime or size changes, since both are part of the thumbnail key.
+    """
+
+    def __init__(self, cache_dir, max_size=(640, 480), quality=80):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._paths = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, source_path, st):
+        h = hashlib.sha1()
+        h.update(os.path.abspath(source_path).encode("utf-8"))
+        h.update(f"|{st.st_mtime_ns}|{st.st_size}|{self.max_size}|{self.quality}".encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, source_path):
+        """
+        Thumbnail path for `source_path`, rendering it on first use.
+        Returns None if the source cannot be read or decoded.
+        """
+        try:
+            st = os.stat(source_path)
+        except OSError:
+            return None
+
+        key = self._key(source_path, st)
+        path = self._paths.get(key)
+        if path is not None:
+            return path
+
+        path = os.path.join(self.cache_dir, f"{key}.jpg")
+        if not os.path.exists(path):
+            try:
+                self._render(source_path, path)
+            except (OSError, ValueError, Image.DecompressionBombError):
+                return None
+
+        with self._lock:
+            self._paths[key] = path
+        return path
+
+    def _render(self, source_path, path):
+        with Image.open(source_path) as image:
+            # JPEG can decode straight to a reduced size, skipping most of the work
+            image.draft("RGB", (self.max_size[0] * 2, self.max_size[1] * 2))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(self.max_size, Image.LANCZOS)
+            if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+                # JPEG has no alpha: flatten onto white, not the black convert() gives
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            image.save(tmp_path, "JPEG", quality=self.quality, optimize=True, progressive=True)
+            os.replace(tmp_path, path)
+
+    def prerender(self, source_paths):
+        """
+        Render thumbnails for every source ahead of time.
+        """
+        for source_path in source_paths:
+            self.get(source_path)